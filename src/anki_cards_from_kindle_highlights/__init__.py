@@ -1,3 +1,8 @@
 """anki-cards-from-kindle-highlights."""
 
-__version__ = "0.1.0"
+from importlib.metadata import PackageNotFoundError, version
+
+try:
+    __version__ = version("anki-cards-from-kindle-highlights")
+except PackageNotFoundError:  # Running from a source tree that isn't installed
+    __version__ = "0.0.0+unknown"
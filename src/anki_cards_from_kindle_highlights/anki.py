@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
 
 ANKI_CONNECT_URL = "http://127.0.0.1:8765"
 TEMPLATES_DIR = Path(__file__).parent / "anki-templates"
@@ -21,6 +22,9 @@ ANKI_FIELDS = [
     "pattern",
 ]
 
+# TypeError text AnkiConnect returns when notesInfo doesn't accept query=
+_QUERY_UNSUPPORTED_ERROR = "unexpected keyword argument 'query'"
+
 
 @dataclass
 class AnkiCard:
@@ -39,10 +43,16 @@ class AnkiConnectError(Exception):
     """Error communicating with AnkiConnect."""
 
 
+# Shared session so consecutive AnkiConnect calls (e.g. one addNote per card
+# during sync) reuse a keep-alive connection instead of reconnecting each time.
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+
+
 def invoke(action: str, **params: Any) -> Any:
     """Invoke an AnkiConnect action."""
     try:
-        response = requests.post(
+        response = _session.post(
             ANKI_CONNECT_URL,
             json={"action": action, "version": 6, "params": params},
             timeout=30,
@@ -191,14 +201,20 @@ def get_cards(deck_name: str = "Kindle Highlights") -> list[AnkiCard]:
     Returns:
         List of AnkiCard objects from the deck.
     """
-    # Find all note IDs in the deck
-    note_ids = invoke("findNotes", query=f'deck:"{deck_name}"')
-
-    if not note_ids:
-        return []
-
-    # Get note info for all notes
-    notes_info = invoke("notesInfo", notes=note_ids)
+    query = f'deck:"{deck_name}"'
+    try:
+        # notesInfo accepts a search query directly, so a single round-trip
+        # replaces findNotes + notesInfo
+        notes_info = invoke("notesInfo", query=query)
+    except AnkiConnectError as e:
+        # Older AnkiConnect versions only accept note IDs; any other failure
+        # (e.g. Anki not running, a bad search) is a real error
+        if _QUERY_UNSUPPORTED_ERROR not in str(e):
+            raise
+        note_ids = invoke("findNotes", query=query)
+        if not note_ids:
+            return []
+        notes_info = invoke("notesInfo", notes=note_ids)
 
     cards: list[AnkiCard] = []
     for note in notes_info:
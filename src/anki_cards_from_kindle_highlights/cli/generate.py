@@ -8,7 +8,6 @@ import typer
 
 from anki_cards_from_kindle_highlights.cli.helpers import get_prompt
 from anki_cards_from_kindle_highlights.db import ClippingsDatabase, get_db_path
-from anki_cards_from_kindle_highlights.llm import llm_highlight_to_card_parallel_async
 
 
 def generate(
@@ -110,6 +109,12 @@ def generate(
 
     print(f"Using {parallel_requests} parallel requests\n")
 
+    # Imported only once there is work to send: the OpenAI SDK is slow to
+    # import, and every other command (and --help) would pay for it
+    from anki_cards_from_kindle_highlights.llm import (
+        llm_highlight_to_card_parallel_async,
+    )
+
     # Process in parallel
     results = llm_highlight_to_card_parallel_async(
         api_key=openai_api_key,
@@ -123,6 +128,7 @@ def generate(
     generated = 0
     skipped = no_content_count
     errors = 0
+    updates: list[tuple[int, str, str | None, str | None]] = []
 
     for result in results:
         if result.error is not None:
@@ -134,11 +140,8 @@ def generate(
             continue
 
         # Update the database with the LLM response (including SKIP)
-        db.update_card_data(
-            record_id=result.record_id,
-            pattern=result.card.pattern,
-            front=result.card.front,
-            back=result.card.back,
+        updates.append(
+            (result.record_id, result.card.pattern, result.card.front, result.card.back)
         )
 
         if result.card.pattern == "SKIP":
@@ -146,6 +149,7 @@ def generate(
         else:
             generated += 1
 
+    db.update_card_data_many(updates)
     db.close()
 
     print()
@@ -8,11 +8,6 @@ import typer
 
 from anki_cards_from_kindle_highlights.cli.helpers import get_prompt
 from anki_cards_from_kindle_highlights.db import ClippingsDatabase, get_db_path
-from anki_cards_from_kindle_highlights.llm import (
-    get_batch_status,
-    retrieve_batch_results,
-    upload_and_create_batch,
-)
 
 
 def _create_new_batch(
@@ -20,6 +15,7 @@ def _create_new_batch(
     api_key: str,
     model: str,
     max_generations: int | None,
+    group_size: int,
 ) -> None:
     """Create and upload a new batch job."""
     # Get books with unprocessed clippings
@@ -82,12 +78,16 @@ def _create_new_batch(
 
     prompt = get_prompt()
 
+    # The llm module (and the OpenAI SDK) is imported lazily; see generate.py
+    from anki_cards_from_kindle_highlights.llm import upload_and_create_batch
+
     print("Uploading batch to OpenAI...")
     batch_id, included_ids = upload_and_create_batch(
         api_key=api_key,
         records=records_to_process,
         prompt=prompt,
         model=model,
+        group_size=group_size,
     )
 
     db.close()
@@ -112,6 +112,11 @@ def _load_batch_results(
     batch_id: str,
 ) -> None:
     """Load results from an existing batch job."""
+    from anki_cards_from_kindle_highlights.llm import (
+        get_batch_status,
+        retrieve_batch_results,
+    )
+
     print(f"Checking batch status: {batch_id}")
 
     status = get_batch_status(api_key, batch_id)
@@ -146,6 +151,7 @@ def _load_batch_results(
     generated = 0
     skipped = 0
     errors = 0
+    updates: list[tuple[int, str, str | None, str | None]] = []
 
     for result in results:
         if result.error is not None:
@@ -157,11 +163,8 @@ def _load_batch_results(
             continue
 
         # Update the database with the LLM response (including SKIP)
-        db.update_card_data(
-            record_id=result.record_id,
-            pattern=result.card.pattern,
-            front=result.card.front,
-            back=result.card.back,
+        updates.append(
+            (result.record_id, result.card.pattern, result.card.front, result.card.back)
         )
 
         if result.card.pattern == "SKIP":
@@ -169,6 +172,7 @@ def _load_batch_results(
         else:
             generated += 1
 
+    db.update_card_data_many(updates)
     db.close()
 
     print()
@@ -198,6 +202,14 @@ def generate_batch(
             help="Limit generation to at most this many clippings (for testing)",
         ),
     ] = None,
+    group_size: Annotated[
+        int,
+        typer.Option(
+            "--group-size",
+            min=1,
+            help="Clippings per batch request; above 1 they share one prompt (cheaper)",
+        ),
+    ] = 1,
     load_batch_id: Annotated[
         str | None,
         typer.Option(
@@ -224,4 +236,4 @@ def generate_batch(
         return
 
     # Mode 1: Create new batch
-    _create_new_batch(db, openai_api_key, model, max_generations)
+    _create_new_batch(db, openai_api_key, model, max_generations, group_size)
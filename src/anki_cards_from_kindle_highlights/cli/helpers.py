@@ -1,5 +1,6 @@
 """Shared helper functions for CLI commands."""
 
+import functools
 from pathlib import Path
 
 import typer
@@ -14,17 +15,32 @@ def version_callback(value: bool) -> None:
         raise typer.Exit()
 
 
+@functools.cache
 def get_prompt() -> str:
-    """Load the system prompt from prompt.txt."""
+    """Load the system prompt from prompt.txt (read once, then cached)."""
     prompt_file = Path(__file__).parent.parent / "prompt.txt"
     return prompt_file.read_text(encoding="utf-8")
 
 
+# Line breaks become spaces when abbreviating to a single line (CRLF is
+# collapsed to "\n" first, so it yields one space rather than two)
+_LINE_BREAKS_TO_SPACES = str.maketrans({"\n": " ", "\r": " "})
+
+
 def abbreviate(text: str | None, max_len: int = 50) -> str:
     """Abbreviate text to a maximum length with ellipsis."""
     if text is None:
         return ""
-    text = text.replace("\n", " ").strip()
+    # Fast path: short single-line text that is already trimmed is returned as-is
+    if (
+        len(text) <= max_len
+        and "\n" not in text
+        and "\r" not in text
+        and not text[:1].isspace()
+        and not text[-1:].isspace()
+    ):
+        return text
+    text = text.replace("\r\n", "\n").translate(_LINE_BREAKS_TO_SPACES).strip()
     if len(text) <= max_len:
         return text
     return text[: max_len - 3] + "..."
@@ -44,18 +44,12 @@ def import_clippings(
         print(f"  - {book}: {count} highlights")
 
     db = ClippingsDatabase(db_path)
-    inserted = 0
-    duplicates = 0
-
-    for clipping in highlights:
-        result = db.insert_clipping(clipping)
-        if result is not None:
-            inserted += 1
-        else:
-            duplicates += 1
-
+    row_ids = db.insert_clippings(highlights)
     db.close()
 
+    inserted = sum(1 for row_id in row_ids if row_id is not None)
+    duplicates = len(row_ids) - inserted
+
     print()
     print(f"Inserted {inserted} new clippings into database")
     if duplicates > 0:
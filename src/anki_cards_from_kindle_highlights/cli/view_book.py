@@ -277,18 +277,16 @@ def view_book(
     ambiguous_count = 0
     error_count = 0
 
-    for clipping in tqdm(clippings, desc="Matching clippings"):
-        if not clipping.content.strip():
-            continue
-
-        try:
-            result = matcher.match(clipping)
+    to_match = [clipping for clipping in clippings if clipping.content.strip()]
+    results = matcher.match_many(tqdm(to_match, desc="Matching clippings"))
+    for clipping, result in zip(to_match, results, strict=True):
+        if isinstance(result, MatchResult):
             successful_matches.append((result, clipping.content))
-        except NoMatchException:
+        elif isinstance(result, NoMatchException):
             no_match_count += 1
-        except AmbiguousMatchException:
+        elif isinstance(result, AmbiguousMatchException):
             ambiguous_count += 1
-        except ValueError:
+        else:
             error_count += 1
 
     print()
@@ -32,16 +32,22 @@ class Clipping:
 # Pattern to extract author from title like "Book Title (Author Name)"
 AUTHOR_PATTERN = re.compile(r"^(.+?)\s*\(([^)]+)\)\s*$")
 
-# Pattern to parse the metadata line
+# Pattern to parse the metadata line. Groups are named (type, page_str,
+# loc_start, loc_end, date_str) rather than positional, and matching is case
+# insensitive so "Location"/"Page" parse like "location"/"page". The page is
+# captured as a word to allow roman numerals ("xi", "iv").
 # Examples:
 # - Your Highlight at location 95-96 | Added on Tuesday, 21 March 2023 22:08:17
 # - Your Highlight on page 5 | location 35-36 | Added on Wednesday, 9 August 2023 23:26:06
 # - Your Bookmark on page 72 | location 932 | Added on Sunday, 13 July 2025 23:35:53
 METADATA_PATTERN = re.compile(
-    r"- Your (Highlight|Note|Bookmark)"
-    r"(?: on page (\d+))?"
-    r"(?: \|? ?(?:at )?location (\d+)(?:-(\d+))?)?"
-    r" \| Added on (.+)$"
+    r"- Your (?P<type>Highlight|Note|Bookmark)"
+    r"(?: on page (?P<page_str>[\w]+))?"  # Capture page as string first (e.g. '5' or 'xi')
+    r"\s*\|?"  # Separator
+    r"\s*(?: at)? location (?P<loc_start>\d+)"  # Capture Start Location
+    r"(?:-(?P<loc_end>\d+))?"  # Capture End Location
+    r"\s*\|\s*Added on (?P<date_str>.+)",  # Capture Date
+    re.IGNORECASE,  # Case insensitive flag
 )
 
 
@@ -49,21 +55,6 @@ def parse_clippings_file(file_path: Path) -> list[Clipping]:
     """
     Parses a Kindle 'My Clippings.txt' file into structured Clipping objects.
     """
-    clippings = []
-
-    # Updated Regex:
-    # 1. re.IGNORECASE handles "Location" vs "location" and "Page" vs "page"
-    # 2. Page capture is [\w]+ to handle "xi", "iv", etc. without breaking the match
-    metadata_pattern = re.compile(
-        r"- Your (?P<type>Highlight|Note|Bookmark)"
-        r"(?: on page (?P<page_str>[\w]+))?"  # Capture page as string first (e.g. '5' or 'xi')
-        r"\s*\|?"  # Separator
-        r"\s*(?: at)? location (?P<loc_start>\d+)"  # Capture Start Location
-        r"(?:-(?P<loc_end>\d+))?"  # Capture End Location
-        r"\s*\|\s*Added on (?P<date_str>.+)",  # Capture Date
-        re.IGNORECASE,  # Case insensitive flag
-    )
-
     try:
         # utf-8-sig handles the BOM (\ufeff) often found in Kindle files
         with Path(file_path).open(encoding="utf-8-sig") as f:
@@ -72,6 +63,18 @@ def parse_clippings_file(file_path: Path) -> list[Clipping]:
         print(f"Error: File not found at {file_path}")
         return []
 
+    return parse_clippings_text(raw_text)
+
+
+def parse_clippings_text(raw_text: str) -> list[Clipping]:
+    """
+    Parses the contents of a Kindle 'My Clippings.txt' file into Clipping objects.
+    """
+    clippings = []
+
+    # Text that was not decoded with utf-8-sig may still start with a BOM
+    raw_text = raw_text.removeprefix("\ufeff")
+
     # The delimiter is strictly 10 equals signs
     raw_entries = raw_text.split("==========")
 
@@ -98,7 +101,7 @@ def parse_clippings_file(file_path: Path) -> list[Clipping]:
 
         # --- 2. Parse Metadata ---
         metadata_line = lines[1].strip()
-        match = metadata_pattern.search(metadata_line)
+        match = METADATA_PATTERN.search(metadata_line)
 
         if not match:
             # Helpful for debugging: print which lines are being skipped
@@ -2,9 +2,12 @@
 
 import os
 import sqlite3
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 from platformdirs import user_data_dir
 
@@ -14,6 +17,33 @@ APP_NAME = "anki-cards-from-kindle-highlights"
 DB_FILENAME = "clippings.db"
 DB_PATH_ENV_VAR = "ANKI_KINDLE_DB_PATH"
 
+_INSERT_CLIPPING_SQL = """
+    INSERT OR IGNORE INTO clippings (
+        book_title, author, clipping_type, page,
+        location_start, location_end, date_added, content,
+        pattern, front, back, imported_at, generated_at, synced_to_anki
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL, ?, NULL, 0)
+"""
+
+_UPDATE_CARD_DATA_SQL = """
+    UPDATE clippings
+    SET pattern = ?, front = ?, back = ?, generated_at = ?
+    WHERE id = ?
+"""
+
+_MARK_SYNCED_SQL = "UPDATE clippings SET synced_to_anki = 1 WHERE id = ?"
+
+# SQLITE_MAX_VARIABLE_NUMBER for SQLite builds older than 3.32
+_MAX_SQL_VARIABLES = 999
+
+# WHERE clauses shared by several queries. All values are bound as ?
+# parameters, so each query's SQL text is constant and sqlite3's statement
+# cache can reuse the prepared statement instead of re-parsing it.
+_UNPROCESSED_WHERE = "pattern IS NULL AND content IS NOT NULL"
+_UNSYNCED_WHERE = "pattern IS NOT NULL AND pattern != 'SKIP' AND synced_to_anki = 0"
+_SYNCED_WHERE = "synced_to_anki = 1"
+_BOOK_WHERE = "book_title = ? AND author = ?"
+
 
 def get_db_path() -> Path:
     """Get the path to the SQLite database file.
@@ -63,10 +93,16 @@ class ClippingRecord:
 class ClippingsDatabase:
     """SQLite database for storing clippings and generated Anki cards."""
 
-    def __init__(self, db_path: Path | None = None) -> None:
-        """Initialize the database connection."""
+    def __init__(self, db_path: str | Path | None = None) -> None:
+        """Initialize the database connection.
+
+        Args:
+            db_path: Path to the database file, or ":memory:" for a private
+                     in-memory database. Defaults to get_db_path().
+        """
         self.db_path = db_path or get_db_path()
         self._connection: sqlite3.Connection | None = None
+        self._transaction_depth = 0
         self._ensure_schema()
 
     def _get_connection(self) -> sqlite3.Connection:
@@ -109,8 +145,59 @@ class ClippingsDatabase:
                 UNIQUE(book_title, author, content)
             )
         """)
+        # Lookups by book (book_title, author) already use the UNIQUE index.
+        # These cover the status filters: unprocessed/generated records
+        # (pattern) and the sync queries (synced_to_anki).
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_clippings_pattern ON clippings(pattern)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_clippings_synced_to_anki "
+            "ON clippings(synced_to_anki)"
+        )
         conn.commit()
 
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group several operations into a single transaction.
+
+        Methods called inside the block don't commit individually; everything
+        is committed once on exit, or rolled back if the block raises.
+        A nested block runs in a savepoint, so if it raises only its own
+        changes are rolled back and the outer transaction carries on.
+        """
+        conn = self._get_connection()
+        depth = self._transaction_depth
+        self._transaction_depth += 1
+        try:
+            if depth == 0:
+                # Begin explicitly: otherwise a nested SAVEPOINT would open the
+                # transaction itself, and its RELEASE would commit everything
+                conn.execute("BEGIN")
+                try:
+                    yield
+                except BaseException:
+                    conn.rollback()
+                    raise
+                conn.commit()
+            else:
+                savepoint = f"sp_{depth}"
+                conn.execute(f"SAVEPOINT {savepoint}")
+                try:
+                    yield
+                except BaseException:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    raise
+                finally:
+                    conn.execute(f"RELEASE {savepoint}")
+        finally:
+            self._transaction_depth -= 1
+
+    def _commit(self) -> None:
+        """Commit, unless a transaction() block will commit later."""
+        if self._transaction_depth == 0:
+            self._get_connection().commit()
+
     def close(self) -> None:
         """Close the database connection."""
         if self._connection is not None:
@@ -119,34 +206,39 @@ class ClippingsDatabase:
 
     def insert_clipping(self, clipping: Clipping) -> int | None:
         """Insert a clipping into the database. Returns the row ID or None if duplicate."""
+        return self.insert_clippings([clipping])[0]
+
+    def insert_clippings(self, clippings: Iterable[Clipping]) -> list[int | None]:
+        """Insert several clippings in a single transaction.
+
+        Returns one entry per clipping: its row ID, or None if it was a duplicate.
+        Rows are inserted one statement at a time (the prepared statement is
+        reused) rather than as one multi-row VALUES, since only a per-row insert
+        tells us which clippings were skipped as duplicates.
+        """
         conn = self._get_connection()
         now = datetime.now().isoformat()
-        try:
-            cursor = conn.execute(
-                """
-                INSERT INTO clippings (
-                    book_title, author, clipping_type, page,
-                    location_start, location_end, date_added, content,
-                    pattern, front, back, imported_at, generated_at, synced_to_anki
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL, ?, NULL, 0)
-                """,
-                (
-                    clipping.book_title,
-                    clipping.author,
-                    clipping.clipping_type.value,
-                    clipping.page,
-                    clipping.location_start,
-                    clipping.location_end,
-                    clipping.date_added.isoformat(),
-                    clipping.content,
-                    now,
-                ),
-            )
-            conn.commit()
-            return cursor.lastrowid
-        except sqlite3.IntegrityError:
-            # Duplicate entry
-            return None
+        row_ids: list[int | None] = []
+        with self.transaction():
+            cursor = conn.cursor()
+            for clipping in clippings:
+                cursor.execute(
+                    _INSERT_CLIPPING_SQL,
+                    (
+                        clipping.book_title,
+                        clipping.author,
+                        clipping.clipping_type.value,
+                        clipping.page,
+                        clipping.location_start,
+                        clipping.location_end,
+                        clipping.date_added.isoformat(),
+                        clipping.content,
+                        now,
+                    ),
+                )
+                # OR IGNORE leaves rowcount at 0 for a duplicate
+                row_ids.append(cursor.lastrowid if cursor.rowcount == 1 else None)
+        return row_ids
 
     def update_card_data(
         self, record_id: int, pattern: str, front: str | None, back: str | None
@@ -154,24 +246,41 @@ class ClippingsDatabase:
         """Update the LLM-generated card data for a clipping."""
         conn = self._get_connection()
         now = datetime.now().isoformat()
-        conn.execute(
-            """
-            UPDATE clippings
-            SET pattern = ?, front = ?, back = ?, generated_at = ?
-            WHERE id = ?
-            """,
-            (pattern, front, back, now, record_id),
-        )
-        conn.commit()
+        conn.execute(_UPDATE_CARD_DATA_SQL, (pattern, front, back, now, record_id))
+        self._commit()
 
     def mark_synced(self, record_id: int) -> None:
         """Mark a clipping as synced to Anki."""
         conn = self._get_connection()
-        conn.execute(
-            "UPDATE clippings SET synced_to_anki = 1 WHERE id = ?",
-            (record_id,),
-        )
-        conn.commit()
+        conn.execute(_MARK_SYNCED_SQL, (record_id,))
+        self._commit()
+
+    def update_card_data_many(
+        self, rows: Iterable[tuple[int, str, str | None, str | None]]
+    ) -> None:
+        """Update card data for many clippings in one transaction.
+
+        Args:
+            rows: (record_id, pattern, front, back) tuples, as for update_card_data.
+        """
+        conn = self._get_connection()
+        now = datetime.now().isoformat()
+        with self.transaction():
+            conn.executemany(
+                _UPDATE_CARD_DATA_SQL,
+                (
+                    (pattern, front, back, now, record_id)
+                    for record_id, pattern, front, back in rows
+                ),
+            )
+
+    def mark_synced_many(self, record_ids: Iterable[int]) -> None:
+        """Mark many clippings as synced to Anki in one transaction."""
+        conn = self._get_connection()
+        with self.transaction():
+            conn.executemany(
+                _MARK_SYNCED_SQL, ((record_id,) for record_id in record_ids)
+            )
 
     def get_books_with_unprocessed(self) -> list[tuple[str, str, int]]:
         """Get all books that have unprocessed clippings.
@@ -179,10 +288,10 @@ class ClippingsDatabase:
         Returns a list of (book_title, author, count) tuples.
         """
         conn = self._get_connection()
-        cursor = conn.execute("""
+        cursor = conn.execute(f"""
             SELECT book_title, author, COUNT(*) as count
             FROM clippings
-            WHERE pattern IS NULL AND content IS NOT NULL
+            WHERE {_UNPROCESSED_WHERE}
             GROUP BY book_title, author
             ORDER BY book_title
         """)
@@ -201,36 +310,44 @@ class ClippingsDatabase:
                    If None, returns all unprocessed clippings.
         """
         if books is None:
-            return self._query_records("pattern IS NULL AND content IS NOT NULL")
-
-        # Build WHERE clause for specific books
-        conditions = []
-        for book_title, author in books:
-            # Escape single quotes in strings
-            escaped_title = book_title.replace("'", "''")
-            escaped_author = author.replace("'", "''")
-            conditions.append(
-                f"(book_title = '{escaped_title}' AND author = '{escaped_author}')"
-            )
-
-        where = (
-            f"pattern IS NULL AND content IS NOT NULL AND ({' OR '.join(conditions)})"
-        )
-        return self._query_records(where)
+            return self._query_records(_UNPROCESSED_WHERE)
+
+        # Each book binds two variables, so query in chunks of books kept
+        # under SQLite's variable limit. Duplicates would match twice.
+        unique_books = list(dict.fromkeys(books))
+        chunk_size = _MAX_SQL_VARIABLES // 2
+        records: list[ClippingRecord] = []
+        with self.transaction():
+            for start in range(0, len(unique_books), chunk_size):
+                chunk = unique_books[start : start + chunk_size]
+                conditions = " OR ".join([f"({_BOOK_WHERE})"] * len(chunk))
+                params = [value for book in chunk for value in book]
+                records.extend(
+                    self._query_records(
+                        f"{_UNPROCESSED_WHERE} AND ({conditions})", params
+                    )
+                )
+        return records
 
     def get_unsynced_cards(self) -> list[ClippingRecord]:
         """Get all cards that have been processed but not synced to Anki."""
-        return self._query_records(
-            "pattern IS NOT NULL AND pattern != 'SKIP' AND synced_to_anki = 0"
-        )
+        return self._query_records(_UNSYNCED_WHERE)
+
+    def count_unsynced(self) -> int:
+        """Count cards that have been processed but not synced to Anki."""
+        return self._count(_UNSYNCED_WHERE)
 
     def get_all_records(self) -> list[ClippingRecord]:
         """Get all records from the database."""
         return self._query_records()
 
+    def count_all(self) -> int:
+        """Count all records in the database."""
+        return self._count()
+
     def get_record_by_id(self, record_id: int) -> ClippingRecord | None:
         """Get a single record by its ID."""
-        records = self._query_records(f"id = {record_id}")
+        records = self._query_records("id = ?", (record_id,))
         return records[0] if records else None
 
     def get_generated_records(self) -> list[ClippingRecord]:
@@ -252,7 +369,7 @@ class ClippingsDatabase:
                 synced_to_anki = 0
             WHERE pattern IS NOT NULL OR synced_to_anki = 1
         """)
-        conn.commit()
+        self._commit()
         return cursor.rowcount
 
     def reset_all_synced(self) -> int:
@@ -266,12 +383,16 @@ class ClippingsDatabase:
             SET synced_to_anki = 0
             WHERE synced_to_anki = 1
         """)
-        conn.commit()
+        self._commit()
         return cursor.rowcount
 
     def get_synced_records(self) -> list[ClippingRecord]:
         """Get all records that are marked as synced to Anki."""
-        return self._query_records("synced_to_anki = 1")
+        return self._query_records(_SYNCED_WHERE)
+
+    def count_synced(self) -> int:
+        """Count records that are marked as synced to Anki."""
+        return self._count(_SYNCED_WHERE)
 
     def reset_generations_for_ids(self, record_ids: list[int]) -> int:
         """Reset LLM-generated fields for specific record IDs.
@@ -288,34 +409,52 @@ class ClippingsDatabase:
             return 0
 
         conn = self._get_connection()
-        placeholders = ",".join("?" * len(record_ids))
-        cursor = conn.execute(
-            f"""
-            UPDATE clippings
-            SET pattern = NULL,
-                front = NULL,
-                back = NULL,
-                generated_at = NULL,
-                synced_to_anki = 0
-            WHERE id IN ({placeholders})
-            """,
-            record_ids,
-        )
-        conn.commit()
-        return cursor.rowcount
-
-    def _query_records(self, where_clause: str | None = None) -> list[ClippingRecord]:
-        """Query records with an optional WHERE clause."""
+        affected = 0
+        with self.transaction():
+            # One IN (...) UPDATE per chunk, kept under SQLite's variable limit
+            for start in range(0, len(record_ids), _MAX_SQL_VARIABLES):
+                chunk = record_ids[start : start + _MAX_SQL_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"""
+                    UPDATE clippings
+                    SET pattern = NULL,
+                        front = NULL,
+                        back = NULL,
+                        generated_at = NULL,
+                        synced_to_anki = 0
+                    WHERE id IN ({placeholders})
+                    """,
+                    chunk,
+                )
+                affected += cursor.rowcount
+        return affected
+
+    def _query_records(
+        self, where_clause: str | None = None, params: Sequence[Any] = ()
+    ) -> list[ClippingRecord]:
+        """Query records with an optional WHERE clause and its ? parameters."""
         conn = self._get_connection()
         query = "SELECT * FROM clippings"
         if where_clause:
             query += f" WHERE {where_clause}"
 
-        cursor = conn.execute(query)
+        cursor = conn.execute(query, params)
         rows = cursor.fetchall()
 
         return [self._row_to_record(row) for row in rows]
 
+    def _count(
+        self, where_clause: str | None = None, params: Sequence[Any] = ()
+    ) -> int:
+        """Count records matching an optional WHERE clause without fetching them."""
+        conn = self._get_connection()
+        query = "SELECT COUNT(*) FROM clippings"
+        if where_clause:
+            query += f" WHERE {where_clause}"
+        row = conn.execute(query, params).fetchone()
+        return int(row[0])
+
     def get_unique_books(self) -> list[tuple[str, str]]:
         """Get all unique (book_title, author) tuples from the database."""
         conn = self._get_connection()
@@ -335,11 +474,7 @@ class ClippingsDatabase:
             book_title: The book title to match.
             author: The author name to match.
         """
-        escaped_title = book_title.replace("'", "''")
-        escaped_author = author.replace("'", "''")
-        return self._query_records(
-            f"book_title = '{escaped_title}' AND author = '{escaped_author}'"
-        )
+        return self._query_records(_BOOK_WHERE, (book_title, author))
 
     def _row_to_record(self, row: sqlite3.Row) -> ClippingRecord:
         """Convert a database row to a ClippingRecord."""
@@ -1,14 +1,14 @@
 """LLM integration for generating Anki cards."""
 
 import asyncio
-import json
-import tempfile
+import functools
+from collections.abc import Callable
 from dataclasses import dataclass
-from pathlib import Path
 from typing import Any, Literal
 
+import orjson
 from openai import APIError, AsyncOpenAI, OpenAI, RateLimitError
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, ValidationError
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -21,6 +21,10 @@ from anki_cards_from_kindle_highlights.db import ClippingRecord
 
 
 class AnkiCardLLMResponse(BaseModel):
+    # Cards are never modified after parsing. extra="forbid" rejects fields
+    # outside the schema, as strict Structured Outputs does.
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     pattern: Literal[
         "DISTINCTION",
         "MENTAL_MODEL",
@@ -35,6 +39,18 @@ class AnkiCardLLMResponse(BaseModel):
     back: str | None
 
 
+class _GroupedCard(AnkiCardLLMResponse):
+    """A card in a grouped response, tagged with the record it was made for."""
+
+    id: int
+
+
+class _GroupedLLMResponse(BaseModel):
+    """LLM response to a grouped batch request: one card per highlight."""
+
+    cards: list[_GroupedCard]
+
+
 @dataclass
 class GenerationResult:
     """Result of processing a single highlight."""
@@ -58,6 +74,16 @@ class BatchStatus:
     error_file_id: str | None = None
 
 
+@functools.lru_cache(maxsize=8)
+def _get_sync_client(api_key: str) -> OpenAI:
+    """Get a process-wide OpenAI client for the given API key.
+
+    Reusing the client keeps its HTTP connection pool alive across calls, so
+    repeated batch status checks don't pay a fresh TLS handshake each time.
+    """
+    return OpenAI(api_key=api_key)
+
+
 @retry(  # type: ignore[misc]
     retry=retry_if_exception_type((RateLimitError, APIError)),
     wait=wait_exponential(multiplier=1, min=1, max=60),
@@ -124,18 +150,22 @@ async def _run_parallel_async(
     max_parallel: int,
 ) -> list[GenerationResult]:
     """Run parallel LLM requests with semaphore-based concurrency control."""
-    client = AsyncOpenAI(api_key=api_key)
     semaphore = asyncio.Semaphore(max_parallel)
 
-    tasks = [
-        _process_single_record(client, prompt, record, model, semaphore)
-        for record in records
-    ]
-
-    results: list[GenerationResult] = []
-    for coro in tqdm.as_completed(tasks, total=len(tasks), desc="Processing clippings"):
-        result = await coro
-        results.append(result)
+    # One client (and connection pool) for the whole run. It is bound to this
+    # event loop, so it is closed here rather than cached across asyncio.run calls.
+    async with AsyncOpenAI(api_key=api_key) as client:
+        tasks = [
+            _process_single_record(client, prompt, record, model, semaphore)
+            for record in records
+        ]
+
+        results: list[GenerationResult] = []
+        for coro in tqdm.as_completed(
+            tasks, total=len(tasks), desc="Processing clippings"
+        ):
+            result = await coro
+            results.append(result)
 
     return results
 
@@ -175,69 +205,183 @@ def llm_highlight_to_card_parallel_async(
 # =============================================================================
 
 
-def _get_response_schema() -> dict[str, Any]:
-    """Get the JSON schema for AnkiCardLLMResponse with additionalProperties: false."""
+# custom_id prefix of grouped requests, followed by the comma-separated record IDs
+_GROUP_ID_PREFIX = "group:"
+
+_GROUP_INSTRUCTIONS = (
+    "Create one card for each highlight below. Return them in `cards`, giving "
+    "each card the number shown in brackets before its highlight as its `id`."
+)
+
+
+@functools.cache
+def _get_response_schema(grouped: bool = False) -> dict[str, Any]:
+    """Get the JSON schema for AnkiCardLLMResponse with additionalProperties: false.
+
+    The schema is built once and shared by every batch request, so callers
+    must not modify it.
+
+    Args:
+        grouped: Get the schema for grouped requests instead: an object whose
+            `cards` array holds one card, plus its record `id`, per highlight.
+    """
     schema = AnkiCardLLMResponse.model_json_schema()
     # OpenAI Batch API requires additionalProperties: false for strict mode
     schema["additionalProperties"] = False
+    if grouped:
+        # Structured Outputs needs an object at the root, so the array of
+        # cards is wrapped in one
+        card_schema = {
+            **schema,
+            "properties": {"id": {"type": "integer"}, **schema["properties"]},
+            "required": ["id", *schema["required"]],
+        }
+        schema = {
+            "type": "object",
+            "properties": {"cards": {"type": "array", "items": card_schema}},
+            "required": ["cards"],
+            "additionalProperties": False,
+        }
     return schema
 
 
+# response_format entries of batch requests. Every request shares these dicts
+# (they are only serialized), so they are built once rather than per record.
+_RESPONSE_FORMAT: dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "AnkiCardLLMResponse",
+        "strict": True,
+        "schema": _get_response_schema(),
+    },
+}
+_GROUPED_RESPONSE_FORMAT: dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "AnkiCardLLMResponses",
+        "strict": True,
+        "schema": _get_response_schema(grouped=True),
+    },
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _system_message(prompt: str) -> dict[str, str]:
+    """Get the system message for a prompt, shared by all requests using it."""
+    return {"role": "system", "content": prompt}
+
+
+def _is_empty(record: ClippingRecord) -> bool:
+    """Whether a record has no highlight text to make a card from."""
+    return not record.content or record.content.isspace()
+
+
+def _make_request_builder(
+    prompt: str, model: str
+) -> Callable[[ClippingRecord], dict[str, Any]]:
+    """Get a function that creates batch request entries for one prompt and model.
+
+    Everything that doesn't depend on the record is fixed here, once per
+    batch, so building each request only fills in its ID and highlight.
+    Records are expected to have content; callers skip _is_empty ones.
+    """
+    system_message = _system_message(prompt)
+
+    def build(record: ClippingRecord) -> dict[str, Any]:
+        return {
+            "custom_id": str(record.id),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": [
+                    system_message,
+                    {
+                        "role": "user",
+                        "content": f"Book: {record.book_title}\nHighlight: {record.content}",
+                    },
+                ],
+                "response_format": _RESPONSE_FORMAT,
+            },
+        }
+
+    return build
+
+
 def _create_batch_request(
     record: ClippingRecord, prompt: str, model: str
-) -> dict[str, Any] | None:
+) -> dict[str, Any]:
     """Create a single batch request entry for a clipping record."""
-    if not record.content:
-        return None
+    return _make_request_builder(prompt, model)(record)
+
 
+def _create_grouped_batch_request(
+    records: list[ClippingRecord], prompt: str, model: str
+) -> dict[str, Any]:
+    """Create one batch request entry covering several clipping records.
+
+    The system prompt is sent once for the whole group, and the model returns
+    one card per highlight, tagged with its record ID.
+    """
+    highlights = "\n\n".join(
+        f"[{record.id}] Book: {record.book_title}\nHighlight: {record.content}"
+        for record in records
+    )
     return {
-        "custom_id": str(record.id),
+        "custom_id": _GROUP_ID_PREFIX + ",".join(str(record.id) for record in records),
         "method": "POST",
         "url": "/v1/chat/completions",
         "body": {
             "model": model,
             "messages": [
-                {"role": "system", "content": prompt},
-                {
-                    "role": "user",
-                    "content": f"Book: {record.book_title}\nHighlight: {record.content}",
-                },
+                _system_message(prompt),
+                {"role": "user", "content": f"{_GROUP_INSTRUCTIONS}\n\n{highlights}"},
             ],
-            "response_format": {
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "AnkiCardLLMResponse",
-                    "strict": True,
-                    "schema": _get_response_schema(),
-                },
-            },
+            "response_format": _GROUPED_RESPONSE_FORMAT,
         },
     }
 
 
 def create_batch_jsonl(
-    records: list[ClippingRecord], prompt: str, model: str
-) -> tuple[str, list[int]]:
+    records: list[ClippingRecord], prompt: str, model: str, group_size: int = 1
+) -> tuple[bytes, list[int]]:
     """Create JSONL content for OpenAI batch API.
 
     Args:
         records: List of ClippingRecord objects to process.
         prompt: System prompt for the LLM.
         model: OpenAI model to use.
+        group_size: Number of clippings per request. Above 1, clippings are
+            grouped so the system prompt is sent once per group rather than
+            once per clipping, which cuts prompt tokens and request count.
 
     Returns:
-        Tuple of (jsonl_content, list of record IDs included in batch).
+        Tuple of (UTF-8 encoded jsonl_content, list of record IDs included in batch).
+        The content is bytes so it can be uploaded as is. Records without
+        content are left out.
     """
-    lines = []
-    included_ids = []
-
-    for record in records:
-        request = _create_batch_request(record, prompt, model)
-        if request is not None:
-            lines.append(json.dumps(request))
+    # Each serialized request is appended to one buffer as it is made, rather
+    # than collected in a list and copied again by a join
+    buffer = bytearray()
+    included_ids: list[int] = []
+
+    if group_size > 1:
+        with_content = [record for record in records if not _is_empty(record)]
+        for start in range(0, len(with_content), group_size):
+            group = with_content[start : start + group_size]
+            buffer += orjson.dumps(_create_grouped_batch_request(group, prompt, model))
+            buffer += b"\n"
+            included_ids.extend(record.id or 0 for record in group)
+    else:
+        build_request = _make_request_builder(prompt, model)
+        for record in records:
+            if _is_empty(record):
+                continue
+            buffer += orjson.dumps(build_request(record))
+            buffer += b"\n"
             included_ids.append(record.id or 0)
 
-    return "\n".join(lines), included_ids
+    return bytes(buffer), included_ids
 
 
 def upload_and_create_batch(
@@ -245,6 +389,7 @@ def upload_and_create_batch(
     records: list[ClippingRecord],
     prompt: str,
     model: str,
+    group_size: int = 1,
 ) -> tuple[str, list[int]]:
     """Upload JSONL file and create a batch job.
 
@@ -253,38 +398,32 @@ def upload_and_create_batch(
         records: List of ClippingRecord objects to process.
         prompt: System prompt for the LLM.
         model: OpenAI model to use.
+        group_size: Number of clippings per request (see create_batch_jsonl).
 
     Returns:
         Tuple of (batch_id, list of record IDs included in batch).
     """
-    client = OpenAI(api_key=api_key)
+    client = _get_sync_client(api_key)
 
     # Create JSONL content
-    jsonl_content, included_ids = create_batch_jsonl(records, prompt, model)
+    jsonl_content, included_ids = create_batch_jsonl(
+        records, prompt, model, group_size=group_size
+    )
 
-    # Write to temp file and upload
-    with tempfile.NamedTemporaryFile(
-        mode="w", suffix=".jsonl", delete=False, encoding="utf-8"
-    ) as f:
-        f.write(jsonl_content)
-        temp_path = Path(f.name)
+    # Upload the content straight from memory, as a named file
+    file_response = client.files.create(
+        file=("batch.jsonl", jsonl_content), purpose="batch"
+    )
 
-    try:
-        # Upload the file
-        with temp_path.open("rb") as f:
-            file_response = client.files.create(file=f, purpose="batch")
-
-        # Create the batch
-        batch = client.batches.create(
-            input_file_id=file_response.id,
-            endpoint="/v1/chat/completions",
-            completion_window="24h",
-            metadata={"description": "anki-cards-from-kindle-highlights batch"},
-        )
+    # Create the batch
+    batch = client.batches.create(
+        input_file_id=file_response.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+        metadata={"description": "anki-cards-from-kindle-highlights batch"},
+    )
 
-        return batch.id, included_ids
-    finally:
-        temp_path.unlink()
+    return batch.id, included_ids
 
 
 def get_batch_status(api_key: str, batch_id: str) -> BatchStatus:
@@ -297,7 +436,7 @@ def get_batch_status(api_key: str, batch_id: str) -> BatchStatus:
     Returns:
         BatchStatus object with current status.
     """
-    client = OpenAI(api_key=api_key)
+    client = _get_sync_client(api_key)
     batch = client.batches.retrieve(batch_id)
 
     request_counts = batch.request_counts
@@ -332,7 +471,7 @@ def retrieve_batch_results(api_key: str, batch_id: str) -> list[GenerationResult
     Raises:
         ValueError: If batch is not complete or has no output file.
     """
-    client = OpenAI(api_key=api_key)
+    client = _get_sync_client(api_key)
     batch = client.batches.retrieve(batch_id)
 
     if batch.status != "completed":
@@ -342,8 +481,10 @@ def retrieve_batch_results(api_key: str, batch_id: str) -> list[GenerationResult
         raise ValueError("Batch has no output file")
 
     # Download the output file
+    # Work on the raw bytes: orjson parses UTF-8 directly, so the file is
+    # never decoded to one big str first
     file_content = client.files.content(batch.output_file_id)
-    lines = file_content.text.strip().split("\n")
+    lines = file_content.content.splitlines()
 
     results: list[GenerationResult] = []
 
@@ -351,19 +492,23 @@ def retrieve_batch_results(api_key: str, batch_id: str) -> list[GenerationResult
         if not line.strip():
             continue
 
-        response = json.loads(line)
-        custom_id = response.get("custom_id", "0")
-        record_id = int(custom_id)
+        response = orjson.loads(line)
+        custom_id: str = response.get("custom_id", "0")
+        grouped = custom_id.startswith(_GROUP_ID_PREFIX)
+        if grouped:
+            record_ids = [
+                int(record_id)
+                for record_id in custom_id.removeprefix(_GROUP_ID_PREFIX).split(",")
+            ]
+        else:
+            record_ids = [int(custom_id)]
 
         # Check for errors
         error = response.get("error")
         if error:
-            results.append(
-                GenerationResult(
-                    record_id=record_id,
-                    card=None,
-                    error=str(error),
-                )
+            results.extend(
+                GenerationResult(record_id=record_id, card=None, error=str(error))
+                for record_id in record_ids
             )
             continue
 
@@ -372,31 +517,66 @@ def retrieve_batch_results(api_key: str, batch_id: str) -> list[GenerationResult
             body = response.get("response", {}).get("body", {})
             choices = body.get("choices", [])
             if not choices:
-                results.append(
+                results.extend(
                     GenerationResult(
                         record_id=record_id,
                         card=None,
                         error="No choices in response",
                     )
+                    for record_id in record_ids
                 )
                 continue
 
             message = choices[0].get("message", {})
             content = message.get("content", "")
 
-            # Parse the JSON content
-            card_data = json.loads(content)
-            card = AnkiCardLLMResponse(**card_data)
+            if grouped:
+                results.extend(_split_grouped_response(content, record_ids))
+                continue
+
+            # Parse and validate the JSON content in one pass
+            card = AnkiCardLLMResponse.model_validate_json(content)
 
-            results.append(GenerationResult(record_id=record_id, card=card))
+            results.append(GenerationResult(record_id=record_ids[0], card=card))
 
-        except (json.JSONDecodeError, KeyError, TypeError) as e:
-            results.append(
+        except (ValidationError, KeyError, TypeError) as e:
+            results.extend(
                 GenerationResult(
                     record_id=record_id,
                     card=None,
                     error=f"Failed to parse response: {e}",
                 )
+                for record_id in record_ids
             )
 
     return results
+
+
+def _split_grouped_response(
+    content: str, record_ids: list[int]
+) -> list[GenerationResult]:
+    """Split the response to a grouped request into one result per record.
+
+    Cards for IDs outside the group are ignored; records the model left out
+    get an error result.
+
+    Raises:
+        ValidationError: If the content is not a valid grouped response.
+    """
+    response = _GroupedLLMResponse.model_validate_json(content)
+    cards = {
+        card.id: AnkiCardLLMResponse(
+            pattern=card.pattern, front=card.front, back=card.back
+        )
+        for card in response.cards
+    }
+    return [
+        GenerationResult(record_id=record_id, card=cards[record_id])
+        if record_id in cards
+        else GenerationResult(
+            record_id=record_id,
+            card=None,
+            error="No card for this clipping in the grouped response",
+        )
+        for record_id in record_ids
+    ]
@@ -1,10 +1,18 @@
 """Match Kindle clippings to their location in book text."""
 
+from __future__ import annotations
+
+import string
+from array import array
 from dataclasses import dataclass
-from typing import Protocol
+from itertools import compress
+from typing import TYPE_CHECKING, AnyStr, Protocol
 
 from anki_cards_from_kindle_highlights.books import Book
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
 
 class HasContent(Protocol):
     """Protocol for objects that have a content attribute."""
@@ -24,22 +32,87 @@ class AmbiguousMatchException(Exception):
         self.match_count = match_count
 
 
-def _skeletonize(text: str) -> tuple[str, list[int]]:
+class _SkeletonTable(dict[int, str | None]):
+    """str.translate table mapping alphanumerics to lowercase and dropping the rest.
+
+    Entries are filled in lazily, so only codepoints that actually occur in
+    the translated text are ever computed and stored.
+    """
+
+    def __missing__(self, codepoint: int) -> str | None:
+        char = chr(codepoint)
+        value: str | None = None
+        if char.isalnum():
+            lower = char.lower()
+            # Keep exactly one character per codepoint so the index map stays aligned
+            value = lower if len(lower) == 1 else char
+        self[codepoint] = value
+        return value
+
+
+_SKELETON_TABLE = _SkeletonTable()
+
+# bytes.translate tables for the ASCII-only case, which avoids a dict lookup
+# per character: lowercase A-Z and delete everything that isn't alphanumeric
+_ASCII_LOWER = bytes.maketrans(
+    string.ascii_uppercase.encode("ascii"), string.ascii_lowercase.encode("ascii")
+)
+_ASCII_NON_ALNUM = bytes(b for b in range(128) if not chr(b).isalnum())
+# Maps each ASCII byte to 1 if it is alphanumeric, else 0
+_ASCII_ALNUM_MASK = bytes(chr(b).isalnum() for b in range(128)).ljust(256, b"\0")
+
+
+def _skeleton_only(text: str) -> str:
+    """Convert text to a skeleton of lowercase alphanumeric characters.
+
+    For callers that don't need positions in the original text (such as the
+    clipping side of a match), which saves building the index map.
+    """
+    if text.isascii():
+        # The common case: a byte-level pass with 256-entry tables
+        return (
+            text.encode("ascii")
+            .translate(_ASCII_LOWER, _ASCII_NON_ALNUM)
+            .decode("ascii")
+        )
+    return text.translate(_SKELETON_TABLE)
+
+
+def _skeletonize(text: str) -> tuple[str, array[int]]:
     """Convert text to a skeleton of lowercase alphanumeric characters.
 
     Returns:
         A tuple of (skeleton_string, index_map) where index_map[i] is the
         index in the original text corresponding to skeleton_string[i].
+        The index map is a compact int array (4 bytes per entry) rather than
+        a list, since it holds one entry per character of a whole book.
     """
-    skeleton_chars: list[str] = []
-    index_map: list[int] = []
-
-    for i, char in enumerate(text):
-        if char.isalnum():
-            skeleton_chars.append(char.lower())
-            index_map.append(i)
-
-    return "".join(skeleton_chars), index_map
+    is_alnum: Iterable[int]
+    if text.isascii():
+        is_alnum = text.encode("ascii").translate(_ASCII_ALNUM_MASK)
+    else:
+        is_alnum = map(str.isalnum, text)
+    # compress() selects the alphanumeric positions in C, without a
+    # Python-level loop over every character of the book
+    index_map = array("i", compress(range(len(text)), is_alnum))
+    return _skeleton_only(text), index_map
+
+
+def _find_all(haystack: AnyStr, needle: AnyStr, limit: int | None = None) -> list[int]:
+    """Return the start offsets of all (possibly overlapping) occurrences.
+
+    Args:
+        limit: Stop searching once this many occurrences have been found.
+    """
+    matches: list[int] = []
+    start = 0
+    while limit is None or len(matches) < limit:
+        pos = haystack.find(needle, start)
+        if pos == -1:
+            break
+        matches.append(pos)
+        start = pos + 1
+    return matches
 
 
 @dataclass
@@ -54,17 +127,31 @@ class BookMatcher(Book):
     """A Book with skeleton-based matching capabilities."""
 
     def __init__(self, author: str, title: str, epub_path: str | None) -> None:
-        super().__init__(author, title, epub_path)
         self._skeleton: str | None = None
-        self._index_map: list[int] | None = None
+        self._index_map: array[int] | None = None
+        # Bytes copy of an ASCII-only skeleton; see _find_in_skeleton
+        self._ascii_skeleton: bytes | None = None
+        super().__init__(author, title, epub_path)
+
+    @property
+    def _text(self) -> str | None:
+        return self._book_text
+
+    @_text.setter
+    def _text(self, value: str | None) -> None:
+        """Store the book text, dropping skeleton data built from a previous text."""
+        self._book_text = value
+        self._skeleton = None
+        self._index_map = None
+        self._ascii_skeleton = None
 
     @classmethod
-    def from_book(cls, book: Book) -> "BookMatcher":
+    def from_book(cls, book: Book) -> BookMatcher:
         """Create a BookMatcher from an existing Book object."""
         return cls(author=book.author, title=book.title, epub_path=book.epub_path)
 
     @property
-    def skeleton(self) -> tuple[str, list[int]] | None:
+    def skeleton(self) -> tuple[str, array[int]] | None:
         """Get the skeleton representation of the book text.
 
         Returns:
@@ -79,8 +166,30 @@ class BookMatcher(Book):
             return None
 
         self._skeleton, self._index_map = _skeletonize(text)
+        self._ascii_skeleton = (
+            self._skeleton.encode("ascii") if self._skeleton.isascii() else None
+        )
         return self._skeleton, self._index_map
 
+    def _find_in_skeleton(
+        self, book_skeleton: str, clipping_skeleton: str, limit: int | None = None
+    ) -> list[int]:
+        """Find occurrences of a clipping skeleton in the book skeleton.
+
+        For ASCII skeletons (the common case for English books) the search runs
+        on bytes, which is faster than str.find. Byte and codepoint offsets
+        coincide for ASCII, so the returned positions index the index map alike.
+
+        Args:
+            limit: Stop after this many occurrences (see _find_all).
+        """
+        ascii_skeleton = self._ascii_skeleton
+        if ascii_skeleton is not None:
+            if not clipping_skeleton.isascii():
+                return []
+            return _find_all(ascii_skeleton, clipping_skeleton.encode("ascii"), limit)
+        return _find_all(book_skeleton, clipping_skeleton, limit)
+
     def match(self, clipping: HasContent) -> MatchResult:
         """Match a clipping to its location in the book text.
 
@@ -95,49 +204,90 @@ class BookMatcher(Book):
             AmbiguousMatchException: If the clipping matches multiple locations.
             ValueError: If the clipping has no content or book has no text.
         """
-        if not clipping.content.strip():
-            raise ValueError("Clipping has no content")
-
-        skeleton_data = self.skeleton
-        if skeleton_data is None:
-            raise ValueError("Book has no text")
-
-        book_skeleton, index_map = skeleton_data
-        clipping_skeleton, _ = _skeletonize(clipping.content)
-
-        if not clipping_skeleton:
-            raise ValueError("Clipping content has no alphanumeric characters")
-
-        # Find all occurrences of the clipping skeleton in the book skeleton
-        matches: list[int] = []
-        start = 0
-        while True:
-            pos = book_skeleton.find(clipping_skeleton, start)
-            if pos == -1:
-                break
-            matches.append(pos)
-            start = pos + 1
-
-        if len(matches) == 0:
-            raise NoMatchException(
-                f"Clipping not found in book: '{clipping.content[:50]}...'"
-            )
-
-        if len(matches) > 1:
-            raise AmbiguousMatchException(
-                f"Clipping matches {len(matches)} locations: '{clipping.content[:50]}...'",
-                match_count=len(matches),
-            )
-
-        # Single unique match - calculate original text position
-        skeleton_start = matches[0]
-        skeleton_end = skeleton_start + len(clipping_skeleton) - 1
-
-        # Map skeleton positions back to original text positions
-        original_start = index_map[skeleton_start]
-        original_end = index_map[skeleton_end]
-
-        # Length includes the end character
-        original_length = original_end - original_start + 1
-
-        return MatchResult(start=original_start, length=original_length)
+        (result,) = self.match_many([clipping])
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def match_many(
+        self, clippings: Iterable[HasContent]
+    ) -> list[MatchResult | NoMatchException | AmbiguousMatchException | ValueError]:
+        """Match several clippings to their locations in the book text.
+
+        The book is skeletonized once, and clippings that share a skeleton
+        (e.g. the same passage highlighted twice) are searched for only once.
+
+        Args:
+            clippings: Objects with a 'content' attribute (Clipping or ClippingRecord).
+
+        Returns:
+            One entry per clipping, in order: its MatchResult, or the exception
+            match() would raise for it.
+
+        Raises:
+            ValueError: If the book has no text (and there is a clipping to match).
+        """
+        results: list[
+            MatchResult | NoMatchException | AmbiguousMatchException | ValueError
+        ] = []
+        found: dict[str, list[int]] = {}
+        for clipping in clippings:
+            if not clipping.content.strip():
+                results.append(ValueError("Clipping has no content"))
+                continue
+
+            skeleton_data = self.skeleton
+            if skeleton_data is None:
+                raise ValueError("Book has no text")
+            book_skeleton, index_map = skeleton_data
+
+            clipping_skeleton = _skeleton_only(clipping.content)
+            if not clipping_skeleton:
+                results.append(
+                    ValueError("Clipping content has no alphanumeric characters")
+                )
+                continue
+
+            # Two occurrences are enough to tell a unique match from an
+            # ambiguous one, so the search stops there
+            matches = found.get(clipping_skeleton)
+            if matches is None:
+                matches = self._find_in_skeleton(
+                    book_skeleton, clipping_skeleton, limit=2
+                )
+                found[clipping_skeleton] = matches
+
+            if len(matches) == 0:
+                results.append(
+                    NoMatchException(
+                        f"Clipping not found in book: '{clipping.content[:50]}...'"
+                    )
+                )
+                continue
+
+            if len(matches) > 1:
+                # Only the error report needs the exact count
+                match_count = len(
+                    self._find_in_skeleton(book_skeleton, clipping_skeleton)
+                )
+                results.append(
+                    AmbiguousMatchException(
+                        f"Clipping matches {match_count} locations: '{clipping.content[:50]}...'",
+                        match_count=match_count,
+                    )
+                )
+                continue
+
+            # Single unique match - calculate original text position
+            skeleton_start = matches[0]
+            skeleton_end = skeleton_start + len(clipping_skeleton) - 1
+
+            # Map skeleton positions back to original text positions
+            original_start = index_map[skeleton_start]
+            original_end = index_map[skeleton_end]
+
+            # Length includes the end character
+            original_length = original_end - original_start + 1
+
+            results.append(MatchResult(start=original_start, length=original_length))
+        return results
@@ -1,30 +1,89 @@
 """Pytest configuration and shared fixtures."""
 
-import gc
-from collections.abc import Generator
+import contextlib
+import sqlite3
+import stat
+from collections.abc import Callable, Generator
 from datetime import datetime
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from typing import Any
+from unittest.mock import MagicMock
 
 import pytest
 
-from anki_cards_from_kindle_highlights.clippings import Clipping, ClippingType
+from anki_cards_from_kindle_highlights.clippings import (
+    Clipping,
+    ClippingType,
+    parse_clippings_file,
+)
 from anki_cards_from_kindle_highlights.db import ClippingsDatabase
 
+# Contents of the sample My Clippings.txt: two highlights and a bookmark
+SAMPLE_CLIPPINGS_TEXT = """Test Book (Test Author)
+- Your Highlight on page 42 | location 100-150 | Added on Monday, 15 January 2024 10:30:00
 
-@pytest.fixture
-def temp_db(tmp_path: Path) -> Generator[ClippingsDatabase, None, None]:
-    """Create an ephemeral test database.
+This is a sample highlight from the book.
+==========
+Another Book (Another Author)
+- Your Highlight on page 10 | location 200-250 | Added on Tuesday, 16 January 2024 14:00:00
 
-    Uses pytest's tmp_path fixture which handles cleanup automatically,
-    avoiding Windows file locking issues.
-    """
-    db_path = tmp_path / "test_clippings.db"
-    db = ClippingsDatabase(db_path)
+Another sample highlight with some interesting content.
+==========
+Test Book (Test Author)
+- Your Bookmark on page 50 | location 300 | Added on Wednesday, 17 January 2024 09:00:00
+
+==========
+"""
+
+# Minimal subset of the Calibre metadata.db schema read by books_from_calibre
+CALIBRE_SCHEMA = """
+    CREATE TABLE books (
+        id INTEGER PRIMARY KEY,
+        title TEXT,
+        path TEXT
+    );
+    CREATE TABLE authors (
+        id INTEGER PRIMARY KEY,
+        name TEXT
+    );
+    CREATE TABLE books_authors_link (
+        id INTEGER PRIMARY KEY,
+        book INTEGER,
+        author INTEGER
+    );
+    CREATE TABLE data (
+        id INTEGER PRIMARY KEY,
+        book INTEGER,
+        name TEXT,
+        format TEXT
+    );
+"""
+
+
+class _RollbackTestCase(Exception):
+    """Raised by temp_db to discard everything a test wrote."""
+
+
+@pytest.fixture(scope="session")
+def _shared_db() -> Generator[ClippingsDatabase, None, None]:
+    """One in-memory database per session (per xdist worker), schema built once."""
+    db = ClippingsDatabase(":memory:")
     yield db
     db.close()
-    # Force garbage collection to release any lingering SQLite handles
-    gc.collect()
+
+
+@pytest.fixture
+def temp_db(_shared_db: ClippingsDatabase) -> Generator[ClippingsDatabase, None, None]:
+    """Provide an empty test database whose changes are undone afterwards.
+
+    The test runs inside a transaction on the shared in-memory database that
+    is rolled back on teardown, so the connection and schema are reused across
+    tests. Nothing touches disk. Tests that need a real file (e.g. the CLI,
+    which opens the database itself via DB_PATH_ENV_VAR) use temp_db_path.
+    """
+    with contextlib.suppress(_RollbackTestCase), _shared_db.transaction():
+        yield _shared_db
+        raise _RollbackTestCase
 
 
 @pytest.fixture
@@ -120,35 +179,112 @@ def mock_openai_client(mock_openai_response: dict[str, str]) -> MagicMock:
     return mock_client
 
 
+class FakeResponse:
+    """Minimal stand-in for requests.Response as used by anki.invoke."""
+
+    def __init__(self, payload: dict[str, Any]) -> None:
+        self._payload = payload
+
+    def json(self) -> dict[str, Any]:
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class PostStub:
+    """Stand-in for the AnkiConnect session's post() that records calls and replays responses.
+
+    Queued ``responses`` are returned in order; once they run out, every
+    call gets ``response``.
+    """
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, dict[str, Any], dict[str, Any]]] = []
+        self.responses: list[dict[str, Any]] = []
+        self.response: dict[str, Any] = {"result": None, "error": None}
+
+    def __call__(self, url: str, json: dict[str, Any], **kwargs: Any) -> FakeResponse:
+        self.calls.append((url, json, kwargs))
+        payload = self.responses.pop(0) if self.responses else self.response
+        return FakeResponse(payload)
+
+    @property
+    def payloads(self) -> list[dict[str, Any]]:
+        """JSON bodies of all requests sent so far."""
+        return [payload for _, payload, _ in self.calls]
+
+
 @pytest.fixture
-def mock_anki_connect() -> Generator[MagicMock, None, None]:
-    """Mock the AnkiConnect requests."""
-    with patch("anki_cards_from_kindle_highlights.anki.requests.post") as mock_post:
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"result": None, "error": None}
-        mock_response.raise_for_status = MagicMock()
-        mock_post.return_value = mock_response
-        yield mock_post
+def post_stub(monkeypatch: pytest.MonkeyPatch) -> PostStub:
+    """Replace the AnkiConnect HTTP call with a recording stub."""
+    stub = PostStub()
+    monkeypatch.setattr("anki_cards_from_kindle_highlights.anki._session.post", stub)
+    return stub
 
 
 @pytest.fixture
-def sample_clippings_file(tmp_path: Path) -> Path:
-    """Create a sample My Clippings.txt file for testing."""
-    content = """Test Book (Test Author)
-- Your Highlight on page 42 | location 100-150 | Added on Monday, 15 January 2024 10:30:00
+def anki_ok(post_stub: PostStub) -> PostStub:
+    """Stub AnkiConnect so every request succeeds with result 1."""
+    post_stub.response = {"result": 1, "error": None}
+    return post_stub
 
-This is a sample highlight from the book.
-==========
-Another Book (Another Author)
-- Your Highlight on page 10 | location 200-250 | Added on Tuesday, 16 January 2024 14:00:00
 
-Another sample highlight with some interesting content.
-==========
-Test Book (Test Author)
-- Your Bookmark on page 50 | location 300 | Added on Wednesday, 17 January 2024 09:00:00
+@pytest.fixture
+def anki_seq(post_stub: PostStub) -> Callable[..., None]:
+    """Return a setter that queues successful AnkiConnect results in order."""
 
-==========
-"""
-    file_path = tmp_path / "My Clippings.txt"
-    file_path.write_text(content, encoding="utf-8-sig")
+    def _set_seq(*results: Any) -> None:
+        post_stub.responses = [{"result": result, "error": None} for result in results]
+
+    return _set_seq
+
+
+@pytest.fixture(scope="session")
+def sample_clippings_file(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Create a sample My Clippings.txt file for testing.
+
+    Session-scoped: the file is written once and made read-only, since every
+    test that uses it shares the same copy.
+    """
+    file_path = tmp_path_factory.mktemp("clippings") / "My Clippings.txt"
+    file_path.write_text(SAMPLE_CLIPPINGS_TEXT, encoding="utf-8-sig")
+    file_path.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
     return file_path
+
+
+@pytest.fixture(scope="session")
+def parsed_sample_clippings(sample_clippings_file: Path) -> list[Clipping]:
+    """Parse the sample clippings file once per session. Do not mutate."""
+    return parse_clippings_file(sample_clippings_file)
+
+
+@pytest.fixture
+def calibre_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Create an empty Calibre library directory.
+
+    Uses tmp_path_factory directly so the directory lands flat under the
+    session's base temp dir instead of in a per-test node directory.
+    """
+    return tmp_path_factory.mktemp("calibre")
+
+
+@pytest.fixture
+def make_calibre_db(calibre_dir: Path) -> Callable[[str], Path]:
+    """Return a factory that creates a Calibre library in calibre_dir.
+
+    The factory takes SQL INSERT statements to seed the metadata.db with.
+    The database is built in memory and written to disk once via backup(),
+    so no journaling or fsync happens per statement.
+    """
+
+    def _make(inserts: str = "") -> Path:
+        mem = sqlite3.connect(":memory:")
+        mem.executescript(CALIBRE_SCHEMA + inserts)
+        disk = sqlite3.connect(calibre_dir / "metadata.db")
+        mem.backup(disk)
+        disk.close()
+        mem.close()
+        return calibre_dir
+
+    return _make
@@ -7,12 +7,16 @@ Focus on:
 - Response parsing (extracting data from Anki's response format)
 """
 
+from collections.abc import Callable
 from typing import Any
-from unittest.mock import MagicMock, patch
 
 import pytest
+import requests
+import requests_mock
 
+from anki_cards_from_kindle_highlights import anki
 from anki_cards_from_kindle_highlights.anki import (
+    ANKI_CONNECT_URL,
     ANKI_FIELDS,
     AnkiCard,
     AnkiConnectError,
@@ -21,263 +25,315 @@ from anki_cards_from_kindle_highlights.anki import (
     invoke,
 )
 
+from .conftest import PostStub
+
+
+def _get_sent_note(post_stub: PostStub) -> dict[str, Any]:
+    """Extract the note dict sent to Anki by the last request."""
+    note: dict[str, Any] = post_stub.payloads[-1]["params"]["note"]
+    return note
+
+
+@pytest.fixture
+def make_card() -> Callable[..., AnkiCard]:
+    """Return a factory for AnkiCards with defaults for every field."""
+
+    def _make(**overrides: Any) -> AnkiCard:
+        fields: dict[str, Any] = {
+            "book_title": "Book",
+            "author": "Author",
+            "original_clipping": "Text",
+            "front": "Q",
+            "back": "A",
+            "pattern": "TACTIC",
+            "db_id": 1,
+        }
+        fields.update(overrides)
+        return AnkiCard(**fields)
+
+    return _make
+
 
 class TestInvokeErrorHandling:
     """Tests for error handling in the invoke function."""
 
-    def test_connection_error_raises_helpful_message(self) -> None:
+    def test_connection_error_raises_helpful_message(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
         """Test that connection errors produce a helpful error message."""
-        import requests
 
-        with patch("anki_cards_from_kindle_highlights.anki.requests.post") as mock_post:
-            mock_post.side_effect = requests.exceptions.ConnectionError()
+        def boom(*_args: Any, **_kwargs: Any) -> None:
+            raise requests.exceptions.ConnectionError()
 
-            with pytest.raises(AnkiConnectError) as exc_info:
-                invoke("testAction")
+        monkeypatch.setattr(
+            "anki_cards_from_kindle_highlights.anki._session.post", boom
+        )
+
+        with pytest.raises(AnkiConnectError) as exc_info:
+            invoke("testAction")
 
-            # Verify the error message is helpful for users
-            error_msg = str(exc_info.value)
-            assert "Cannot connect" in error_msg
-            assert "AnkiConnect" in error_msg
-            assert "ankiweb.net" in error_msg  # Should include install link
+        # Verify the error message is helpful for users
+        error_msg = str(exc_info.value)
+        assert "Cannot connect" in error_msg
+        assert "AnkiConnect" in error_msg
+        assert "ankiweb.net" in error_msg  # Should include install link
 
-    def test_api_error_propagates_message(self, mock_anki_connect: MagicMock) -> None:
+    def test_api_error_propagates_message(
+        self, requests_mock: requests_mock.Mocker
+    ) -> None:
         """Test that API errors from Anki are properly propagated."""
-        mock_anki_connect.return_value.json.return_value = {
-            "result": None,
-            "error": "deck was not found",
-        }
+        requests_mock.post(
+            ANKI_CONNECT_URL, json={"result": None, "error": "deck was not found"}
+        )
 
         with pytest.raises(AnkiConnectError, match="deck was not found"):
             invoke("addNote", note={})
 
-    def test_request_format_is_correct(self, mock_anki_connect: MagicMock) -> None:
+    def test_request_format_is_correct(
+        self, requests_mock: requests_mock.Mocker
+    ) -> None:
         """Test that we send the correct request format to AnkiConnect."""
-        mock_anki_connect.return_value.json.return_value = {
-            "result": None,
-            "error": None,
-        }
+        requests_mock.post(ANKI_CONNECT_URL, json={"result": None, "error": None})
 
         invoke("testAction", someParam="someValue", anotherParam=123)
 
         # Verify the request structure matches AnkiConnect's expected format
-        call_kwargs = mock_anki_connect.call_args[1]
-        request_body = call_kwargs["json"]
+        assert requests_mock.last_request is not None
+        request_body = requests_mock.last_request.json()
 
         assert request_body["action"] == "testAction"
         assert request_body["version"] == 6  # AnkiConnect API version
         assert request_body["params"]["someParam"] == "someValue"
         assert request_body["params"]["anotherParam"] == 123
 
+    def test_returns_result(self, requests_mock: requests_mock.Mocker) -> None:
+        """Test that the result field of a successful response is returned."""
+        requests_mock.post(ANKI_CONNECT_URL, json={"result": [1, 2], "error": None})
 
-class TestCardToAnkiLogic:
-    """Tests for card_to_anki's logic and data transformation."""
+        assert invoke("findNotes", query="deck:x") == [1, 2]
 
-    def _get_sent_note(self, mock_anki_connect: MagicMock) -> dict[str, Any]:
-        """Helper to extract the note dict sent to Anki."""
-        call_kwargs = mock_anki_connect.call_args[1]
-        note: dict[str, Any] = call_kwargs["json"]["params"]["note"]
-        return note
+    def test_reuses_session(self, post_stub: PostStub) -> None:
+        """Test that consecutive calls all go through the shared HTTP session."""
+        invoke("deckNames")
+        invoke("modelNames")
 
-    def test_definition_pattern_uses_cloze_model(
-        self, mock_anki_connect: MagicMock
-    ) -> None:
-        """Test that DEFINITION pattern selects the cloze model."""
-        mock_anki_connect.return_value.json.return_value = {
-            "result": 1,
-            "error": None,
-        }
+        # post_stub replaces the module session's post(), so it only sees
+        # requests that were sent through that session
+        assert [payload["action"] for payload in post_stub.payloads] == [
+            "deckNames",
+            "modelNames",
+        ]
+        assert isinstance(anki._session, requests.Session)
 
-        card = AnkiCard(
-            book_title="Book",
-            author="Author",
-            original_clipping="Text",
-            front="{{c1::Term}} is defined as X",
-            back="",
-            pattern="DEFINITION",
-            db_id=1,
-        )
-        card_to_anki(card)
 
-        note = self._get_sent_note(mock_anki_connect)
-        assert "Cloze" in note["modelName"]
+# --- card_to_anki logic and data transformation ---
 
-    def test_non_definition_patterns_use_basic_model(
-        self, mock_anki_connect: MagicMock
-    ) -> None:
-        """Test that non-DEFINITION patterns select the basic model."""
-        mock_anki_connect.return_value.json.return_value = {
-            "result": 1,
-            "error": None,
-        }
 
-        for pattern in ["MENTAL_MODEL", "DISTINCTION", "FRAMEWORK", "TACTIC"]:
-            card = AnkiCard(
-                book_title="Book",
-                author="Author",
-                original_clipping="Text",
-                front="Question",
-                back="Answer",
-                pattern=pattern,
-                db_id=1,
-            )
-            card_to_anki(card)
-
-            note = self._get_sent_note(mock_anki_connect)
-            assert "Basic" in note["modelName"], f"Pattern {pattern} should use Basic"
-
-    def test_all_fields_are_sent(self, mock_anki_connect: MagicMock) -> None:
-        """Test that all required fields are included in the note."""
-        mock_anki_connect.return_value.json.return_value = {
-            "result": 1,
-            "error": None,
-        }
+def test_definition_pattern_uses_cloze_model(
+    anki_ok: PostStub, make_card: Callable[..., AnkiCard]
+) -> None:
+    """Test that DEFINITION pattern selects the cloze model."""
+    card_to_anki(
+        make_card(front="{{c1::Term}} is defined as X", back="", pattern="DEFINITION")
+    )
 
-        card = AnkiCard(
-            book_title="My Book Title",
-            author="John Author",
-            original_clipping="The original text",
-            front="The question",
-            back="The answer",
-            pattern="MENTAL_MODEL",
-            db_id=42,
-        )
-        card_to_anki(card)
-
-        note = self._get_sent_note(mock_anki_connect)
-        fields = note["fields"]
-
-        # Verify all fields are present and correctly populated
-        assert fields["book_title"] == "My Book Title"
-        assert fields["author"] == "John Author"
-        assert fields["original_clipping"] == "The original text"
-        assert fields["front"] == "The question"
-        assert fields["back"] == "The answer"
-        assert fields["pattern"] == "MENTAL_MODEL"
-        assert fields["db_id"] == "42"  # Should be string for Anki
-
-    def test_tags_are_generated_correctly(self, mock_anki_connect: MagicMock) -> None:
-        """Test that tags are generated from book title and pattern."""
-        mock_anki_connect.return_value.json.return_value = {
-            "result": 1,
-            "error": None,
-        }
+    note = _get_sent_note(anki_ok)
+    assert "Cloze" in note["modelName"]
 
-        card = AnkiCard(
-            book_title="The Great Book",
-            author="Author",
-            original_clipping="Text",
-            front="Q",
-            back="A",
-            pattern="FRAMEWORK",
-            db_id=1,
-        )
-        card_to_anki(card)
 
-        note = self._get_sent_note(mock_anki_connect)
-        tags = note["tags"]
+@pytest.mark.parametrize(
+    "pattern", ["MENTAL_MODEL", "DISTINCTION", "FRAMEWORK", "TACTIC"]
+)
+def test_non_definition_patterns_use_basic_model(
+    anki_ok: PostStub, make_card: Callable[..., AnkiCard], pattern: str
+) -> None:
+    """Test that non-DEFINITION patterns select the basic model."""
+    card_to_anki(make_card(pattern=pattern))
 
-        # Verify tag format (spaces replaced with underscores)
-        assert "book::The_Great_Book" in tags
-        assert "pattern::FRAMEWORK" in tags
+    note = _get_sent_note(anki_ok)
+    assert "Basic" in note["modelName"]
 
-    def test_duplicate_handling_options(self, mock_anki_connect: MagicMock) -> None:
-        """Test that duplicate handling is configured correctly."""
-        mock_anki_connect.return_value.json.return_value = {
-            "result": 1,
-            "error": None,
-        }
 
-        card = AnkiCard(
-            book_title="Book",
-            author="Author",
-            original_clipping="Text",
-            front="Q",
-            back="A",
-            pattern="TACTIC",
-            db_id=1,
-        )
-        card_to_anki(card)
+def test_all_fields_are_sent(
+    anki_ok: PostStub, make_card: Callable[..., AnkiCard]
+) -> None:
+    """Test that all required fields are included in the note."""
+    card = make_card(
+        book_title="My Book Title",
+        author="John Author",
+        original_clipping="The original text",
+        front="The question",
+        back="The answer",
+        pattern="MENTAL_MODEL",
+        db_id=42,
+    )
+    card_to_anki(card)
 
-        note = self._get_sent_note(mock_anki_connect)
-        options = note["options"]
+    fields = _get_sent_note(anki_ok)["fields"]
 
-        assert options["allowDuplicate"] is False
-        assert options["duplicateScope"] == "deck"
+    # Verify all fields are present and correctly populated
+    assert fields["book_title"] == "My Book Title"
+    assert fields["author"] == "John Author"
+    assert fields["original_clipping"] == "The original text"
+    assert fields["front"] == "The question"
+    assert fields["back"] == "The answer"
+    assert fields["pattern"] == "MENTAL_MODEL"
+    assert fields["db_id"] == "42"  # Should be string for Anki
 
 
-class TestGetCardsResponseParsing:
-    """Tests for get_cards' parsing of Anki's response format."""
+def test_tags_are_generated_correctly(
+    anki_ok: PostStub, make_card: Callable[..., AnkiCard]
+) -> None:
+    """Test that tags are generated from book title and pattern."""
+    card_to_anki(make_card(book_title="The Great Book", pattern="FRAMEWORK"))
 
-    def test_parses_anki_field_structure(self, mock_anki_connect: MagicMock) -> None:
-        """Test parsing of Anki's nested field structure."""
-        # Anki returns fields in a specific nested format
-        mock_anki_connect.return_value.json.side_effect = [
-            {"result": [100], "error": None},  # findNotes
-            {
-                "result": [
-                    {
-                        "fields": {
-                            "book_title": {"value": "Parsed Book"},
-                            "author": {"value": "Parsed Author"},
-                            "original_clipping": {"value": "Clipping"},
-                            "front": {"value": "Front"},
-                            "back": {"value": "Back"},
-                            "pattern": {"value": "METAPHOR"},
-                            "db_id": {"value": "999"},
-                        }
-                    }
-                ],
-                "error": None,
-            },
-        ]
+    tags = _get_sent_note(anki_ok)["tags"]
 
-        cards = get_cards()
+    # Verify tag format (spaces replaced with underscores)
+    assert "book::The_Great_Book" in tags
+    assert "pattern::FRAMEWORK" in tags
 
-        assert len(cards) == 1
-        card = cards[0]
-        assert card.book_title == "Parsed Book"
-        assert card.author == "Parsed Author"
-        assert card.pattern == "METAPHOR"
-        assert card.db_id == 999  # Should be converted to int
 
-    def test_handles_missing_fields_gracefully(
-        self, mock_anki_connect: MagicMock
-    ) -> None:
-        """Test that missing fields don't crash parsing."""
-        mock_anki_connect.return_value.json.side_effect = [
-            {"result": [1], "error": None},
+def test_duplicate_handling_options(
+    anki_ok: PostStub, make_card: Callable[..., AnkiCard]
+) -> None:
+    """Test that duplicate handling is configured correctly."""
+    card_to_anki(make_card())
+
+    options = _get_sent_note(anki_ok)["options"]
+
+    assert options["allowDuplicate"] is False
+    assert options["duplicateScope"] == "deck"
+
+
+# --- get_cards response parsing ---
+
+
+def test_parses_anki_field_structure(anki_seq: Callable[..., None]) -> None:
+    """Test parsing of Anki's nested field structure."""
+    # Anki returns fields in a specific nested format
+    anki_seq(
+        [
             {
-                "result": [
-                    {
-                        "fields": {
-                            # Only some fields present
-                            "book_title": {"value": "Book"},
-                            "db_id": {"value": "1"},
-                        }
-                    }
-                ],
-                "error": None,
-            },
-        ]
+                "fields": {
+                    "book_title": {"value": "Parsed Book"},
+                    "author": {"value": "Parsed Author"},
+                    "original_clipping": {"value": "Clipping"},
+                    "front": {"value": "Front"},
+                    "back": {"value": "Back"},
+                    "pattern": {"value": "METAPHOR"},
+                    "db_id": {"value": "999"},
+                }
+            }
+        ],
+    )
+
+    cards = get_cards()
+
+    assert len(cards) == 1
+    card = cards[0]
+    assert card.book_title == "Parsed Book"
+    assert card.author == "Parsed Author"
+    assert card.pattern == "METAPHOR"
+    assert card.db_id == 999  # Should be converted to int
+
+
+def test_handles_missing_fields_gracefully(anki_seq: Callable[..., None]) -> None:
+    """Test that missing fields don't crash parsing."""
+    anki_seq(
+        [
+            {
+                "fields": {
+                    # Only some fields present
+                    "book_title": {"value": "Book"},
+                    "db_id": {"value": "1"},
+                }
+            }
+        ],
+    )
 
-        # Should not raise, should use defaults
-        cards = get_cards()
-        assert len(cards) == 1
-        assert cards[0].book_title == "Book"
-        assert cards[0].author == ""  # Default for missing field
-
-    def test_empty_deck_returns_empty_list(self, mock_anki_connect: MagicMock) -> None:
-        """Test that an empty deck returns an empty list without errors."""
-        mock_anki_connect.return_value.json.return_value = {
-            "result": [],
-            "error": None,
-        }
+    # Should not raise, should use defaults
+    cards = get_cards()
+    assert len(cards) == 1
+    assert cards[0].book_title == "Book"
+    assert cards[0].author == ""  # Default for missing field
+
+
+def test_empty_deck_returns_empty_list(
+    post_stub: PostStub, anki_seq: Callable[..., None]
+) -> None:
+    """Test that an empty deck returns an empty list without errors."""
+    anki_seq([])
+
+    cards = get_cards()
+    assert cards == []
+    assert len(post_stub.calls) == 1
+
+
+def test_fetches_notes_in_one_request(
+    post_stub: PostStub, anki_seq: Callable[..., None]
+) -> None:
+    """Test that notesInfo is queried by deck directly, without findNotes."""
+    anki_seq([{"fields": {"db_id": {"value": "7"}}}])
+
+    cards = get_cards(deck_name="My Deck")
+
+    assert [card.db_id for card in cards] == [7]
+    assert len(post_stub.calls) == 1
+    request_body = post_stub.payloads[-1]
+    assert request_body["action"] == "notesInfo"
+    assert request_body["params"] == {"query": 'deck:"My Deck"'}
+
+
+def test_falls_back_to_find_notes(post_stub: PostStub) -> None:
+    """Test the findNotes + notesInfo fallback for older AnkiConnect versions."""
+    post_stub.responses = [
+        {"result": None, "error": "unexpected keyword argument 'query'"},
+        {"result": [5], "error": None},  # findNotes
+        {"result": [{"fields": {"db_id": {"value": "5"}}}], "error": None},
+    ]
+
+    cards = get_cards()
+
+    assert [card.db_id for card in cards] == [5]
+    actions = [payload["action"] for payload in post_stub.payloads]
+    assert actions == ["notesInfo", "findNotes", "notesInfo"]
+
+
+def test_connection_error_does_not_fall_back(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a connection error is raised instead of retried via findNotes."""
+    calls: list[str] = []
+
+    def boom(*_args: Any, **kwargs: Any) -> None:
+        calls.append(kwargs["json"]["action"])
+        raise requests.exceptions.ConnectionError()
+
+    monkeypatch.setattr("anki_cards_from_kindle_highlights.anki._session.post", boom)
+
+    with pytest.raises(AnkiConnectError, match="Cannot connect"):
+        get_cards()
+
+    assert calls == ["notesInfo"]
+
+
+def test_other_errors_do_not_fall_back(post_stub: PostStub) -> None:
+    """Test that errors unrelated to the query argument propagate."""
+    post_stub.responses = [{"result": None, "error": "collection is not available"}]
+
+    with pytest.raises(AnkiConnectError, match="collection is not available"):
+        get_cards()
+
+    assert len(post_stub.payloads) == 1
+
+
+def test_query_errors_do_not_fall_back(post_stub: PostStub) -> None:
+    """Test that a bad search is raised, not mistaken for an unsupported query."""
+    post_stub.responses = [{"result": None, "error": "invalid search query: deck:"}]
+
+    with pytest.raises(AnkiConnectError, match="invalid search query"):
+        get_cards()
 
-        cards = get_cards()
-        assert cards == []
-        # Should only call findNotes, not notesInfo
-        assert mock_anki_connect.call_count == 1
+    assert len(post_stub.payloads) == 1
 
 
 class TestAnkiFieldsConfiguration:
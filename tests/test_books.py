@@ -1,6 +1,6 @@
 """Tests for book metadata and content extraction."""
 
-import sqlite3
+from collections.abc import Callable
 from pathlib import Path
 
 import pytest
@@ -12,23 +12,34 @@ from anki_cards_from_kindle_highlights.books import (
 )
 
 
-class TestHtmlToText:
-    """Tests for _html_to_text function."""
+@pytest.fixture(
+    params=[
+        ("<p>Hello World</p>", ["Hello World"]),
+        (
+            "<div><p><strong>Bold</strong> and <em>italic</em></p></div>",
+            ["Bold", "italic"],
+        ),
+        # Some structure is preserved via Markdown
+        ("<h1>Title</h1><p>Paragraph</p>", ["Title", "Paragraph"]),
+    ],
+    ids=["simple", "nested-tags", "structure"],
+)
+def html_case(request: pytest.FixtureRequest) -> tuple[str, list[str]]:
+    """An HTML snippet and the text fragments its conversion must contain."""
+    case: tuple[str, list[str]] = request.param
+    return case
 
-    def test_simple_html(self) -> None:
-        """Test converting simple HTML to text."""
-        html = "<p>Hello World</p>"
-        text = _html_to_text(html)
 
-        assert "Hello World" in text
+class TestHtmlToText:
+    """Tests for _html_to_text function."""
 
-    def test_strips_tags(self) -> None:
-        """Test that HTML tags are stripped."""
-        html = "<div><p><strong>Bold</strong> and <em>italic</em></p></div>"
+    def test_html_to_text(self, html_case: tuple[str, list[str]]) -> None:
+        """Test that HTML is converted to text with tags stripped."""
+        html, expected_fragments = html_case
         text = _html_to_text(html)
 
-        assert "Bold" in text
-        assert "italic" in text
+        for fragment in expected_fragments:
+            assert fragment in text
         assert "<" not in text
         assert ">" not in text
 
@@ -39,14 +50,6 @@ class TestHtmlToText:
 
         assert "Hello from bytes" in text
 
-    def test_preserves_structure(self) -> None:
-        """Test that some structure is preserved via Markdown."""
-        html = "<h1>Title</h1><p>Paragraph</p>"
-        text = _html_to_text(html)
-
-        assert "Title" in text
-        assert "Paragraph" in text
-
 
 class TestBook:
     """Tests for the Book class."""
@@ -91,170 +94,77 @@ class TestBook:
         assert book.text == "Cached content"
 
 
+def _check_epub_path(result: dict[tuple[str, str], Book]) -> None:
+    book = result[("Test Author", "Test Book")]
+    assert book.author == "Test Author"
+    assert book.title == "Test Book"
+    # Check path components in OS-independent way
+    assert book.epub_path is not None
+    epub_path = Path(book.epub_path)
+    assert epub_path.name == "Test Book.epub"
+    assert "Test Book (1)" in epub_path.parts
+
+
+def _check_prefers_epub(result: dict[tuple[str, str], Book]) -> None:
+    book = result[("Author", "Multi Format")]
+    assert book.epub_path is not None
+    assert book.epub_path.endswith(".epub")
+
+
+# (SQL inserts, expected (author, title) keys, extra assertions on the result)
+CALIBRE_CASES = [
+    ("", set(), None),
+    (
+        """
+        INSERT INTO books (id, title, path)
+            VALUES (1, 'Test Book', 'Author/Test Book (1)');
+        INSERT INTO authors (id, name) VALUES (1, 'Test Author');
+        INSERT INTO books_authors_link (book, author) VALUES (1, 1);
+        INSERT INTO data (book, name, format) VALUES (1, 'Test Book', 'EPUB');
+        """,
+        {("Test Author", "Test Book")},
+        _check_epub_path,
+    ),
+    (
+        """
+        INSERT INTO books (id, title, path)
+            VALUES (1, 'Multi Format', 'Author/Multi Format (1)');
+        INSERT INTO authors (id, name) VALUES (1, 'Author');
+        INSERT INTO books_authors_link (book, author) VALUES (1, 1);
+        INSERT INTO data (book, name, format) VALUES (1, 'Multi Format', 'PDF');
+        INSERT INTO data (book, name, format) VALUES (1, 'Multi Format', 'EPUB');
+        INSERT INTO data (book, name, format) VALUES (1, 'Multi Format', 'MOBI');
+        """,
+        {("Author", "Multi Format")},
+        _check_prefers_epub,
+    ),
+]
+
+
+@pytest.mark.filesystem
 class TestBooksFromCalibre:
     """Tests for books_from_calibre function."""
 
-    def test_raises_for_nonexistent_db(self, tmp_path: Path) -> None:
+    def test_raises_for_nonexistent_db(self, calibre_dir: Path) -> None:
         """Test that FileNotFoundError is raised for missing metadata.db."""
         with pytest.raises(FileNotFoundError, match="Calibre database not found"):
-            books_from_calibre(tmp_path)
-
-    def test_reads_empty_calibre_db(self, tmp_path: Path) -> None:
-        """Test reading an empty Calibre database."""
-        # Create a minimal Calibre-like database
-        db_path = tmp_path / "metadata.db"
-        conn = sqlite3.connect(db_path)
-        conn.execute("""
-            CREATE TABLE books (
-                id INTEGER PRIMARY KEY,
-                title TEXT,
-                path TEXT
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE authors (
-                id INTEGER PRIMARY KEY,
-                name TEXT
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE books_authors_link (
-                id INTEGER PRIMARY KEY,
-                book INTEGER,
-                author INTEGER
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE data (
-                id INTEGER PRIMARY KEY,
-                book INTEGER,
-                name TEXT,
-                format TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
-
-        result = books_from_calibre(tmp_path)
-
-        assert result == {}
-
-    def test_reads_books_with_epub(self, tmp_path: Path) -> None:
-        """Test reading books with EPUB format."""
-        # Create a minimal Calibre-like database with a book
-        db_path = tmp_path / "metadata.db"
-        conn = sqlite3.connect(db_path)
-
-        conn.execute("""
-            CREATE TABLE books (
-                id INTEGER PRIMARY KEY,
-                title TEXT,
-                path TEXT
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE authors (
-                id INTEGER PRIMARY KEY,
-                name TEXT
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE books_authors_link (
-                id INTEGER PRIMARY KEY,
-                book INTEGER,
-                author INTEGER
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE data (
-                id INTEGER PRIMARY KEY,
-                book INTEGER,
-                name TEXT,
-                format TEXT
-            )
-        """)
-
-        # Insert test data
-        conn.execute(
-            "INSERT INTO books (id, title, path) VALUES (1, 'Test Book', 'Author/Test Book (1)')"
-        )
-        conn.execute("INSERT INTO authors (id, name) VALUES (1, 'Test Author')")
-        conn.execute("INSERT INTO books_authors_link (book, author) VALUES (1, 1)")
-        conn.execute(
-            "INSERT INTO data (book, name, format) VALUES (1, 'Test Book', 'EPUB')"
-        )
-        conn.commit()
-        conn.close()
-
-        result = books_from_calibre(tmp_path)
-
-        assert len(result) == 1
-        key = ("Test Author", "Test Book")
-        assert key in result
-        assert result[key].author == "Test Author"
-        assert result[key].title == "Test Book"
-        # Check path components in OS-independent way
-        epub_path_str = result[key].epub_path
-        assert epub_path_str is not None
-        epub_path = Path(epub_path_str)
-        assert epub_path.name == "Test Book.epub"
-        assert "Test Book (1)" in epub_path.parts
-
-    def test_prefers_epub_over_other_formats(self, tmp_path: Path) -> None:
-        """Test that EPUB format is preferred over others."""
-        db_path = tmp_path / "metadata.db"
-        conn = sqlite3.connect(db_path)
-
-        conn.execute("""
-            CREATE TABLE books (
-                id INTEGER PRIMARY KEY,
-                title TEXT,
-                path TEXT
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE authors (
-                id INTEGER PRIMARY KEY,
-                name TEXT
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE books_authors_link (
-                id INTEGER PRIMARY KEY,
-                book INTEGER,
-                author INTEGER
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE data (
-                id INTEGER PRIMARY KEY,
-                book INTEGER,
-                name TEXT,
-                format TEXT
-            )
-        """)
-
-        # Insert test data with multiple formats
-        conn.execute(
-            "INSERT INTO books (id, title, path) VALUES (1, 'Multi Format', 'Author/Multi Format (1)')"
-        )
-        conn.execute("INSERT INTO authors (id, name) VALUES (1, 'Author')")
-        conn.execute("INSERT INTO books_authors_link (book, author) VALUES (1, 1)")
-        conn.execute(
-            "INSERT INTO data (book, name, format) VALUES (1, 'Multi Format', 'PDF')"
-        )
-        conn.execute(
-            "INSERT INTO data (book, name, format) VALUES (1, 'Multi Format', 'EPUB')"
-        )
-        conn.execute(
-            "INSERT INTO data (book, name, format) VALUES (1, 'Multi Format', 'MOBI')"
-        )
-        conn.commit()
-        conn.close()
-
-        result = books_from_calibre(tmp_path)
-
-        assert len(result) == 1
-        book = result[("Author", "Multi Format")]
-        assert book.epub_path is not None
-        assert book.epub_path.endswith(".epub")
+            books_from_calibre(calibre_dir)
+
+    @pytest.mark.parametrize(
+        ("inserts", "expected", "extra"),
+        CALIBRE_CASES,
+        ids=["empty", "epub", "prefers-epub"],
+    )
+    def test_books_from_calibre(
+        self,
+        make_calibre_db: Callable[[str], Path],
+        inserts: str,
+        expected: set[tuple[str, str]],
+        extra: Callable[[dict[tuple[str, str], Book]], None] | None,
+    ) -> None:
+        """Test reading books and picking their EPUB from a Calibre database."""
+        result = books_from_calibre(make_calibre_db(inserts))
+
+        assert set(result) == expected
+        if extra is not None:
+            extra(result)
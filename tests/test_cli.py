@@ -1,25 +1,42 @@
 """Tests for the CLI module."""
 
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
 from typer.testing import CliRunner
 
+from anki_cards_from_kindle_highlights import __version__
 from anki_cards_from_kindle_highlights.cli import app
 
 runner = CliRunner()
 
 
+@pytest.fixture(scope="session")
+def help_texts() -> dict[str, str]:
+    """Render the --help output of the app and its main commands once."""
+    texts: dict[str, str] = {}
+    for command in ("root", "import", "generate", "dump", "sync-to-anki"):
+        args = ["--help"] if command == "root" else [command, "--help"]
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0
+        texts[command] = result.stdout
+    return texts
+
+
 def test_version_flag() -> None:
     """Test that --version shows the version."""
     result = runner.invoke(app, ["--version"])
     assert result.exit_code == 0
-    # Check for version format (e.g., "0.2.0")
-    assert "." in result.stdout  # Version has dots
+    # Must match the package's version, not a hardcoded string
+    assert result.stdout.strip() == f"anki-cards-from-kindle-highlights {__version__}"
 
 
-def test_help_flag() -> None:
+def test_help_flag(help_texts: dict[str, str]) -> None:
     """Test that --help shows help text."""
-    result = runner.invoke(app, ["--help"])
-    assert result.exit_code == 0
-    assert "Generate Anki cards from Kindle highlights" in result.stdout
+    assert "Generate Anki cards from Kindle highlights" in help_texts["root"]
 
 
 def test_no_args_shows_help() -> None:
@@ -30,29 +47,36 @@ def test_no_args_shows_help() -> None:
     assert "generate" in result.stdout or "import" in result.stdout
 
 
-def test_import_command_help() -> None:
+def test_import_command_help(help_texts: dict[str, str]) -> None:
     """Test import command help."""
-    result = runner.invoke(app, ["import", "--help"])
-    assert result.exit_code == 0
-    assert "clippings" in result.stdout.lower()
+    assert "clippings" in help_texts["import"].lower()
 
 
-def test_generate_command_help() -> None:
+def test_generate_command_help(help_texts: dict[str, str]) -> None:
     """Test generate command help."""
-    result = runner.invoke(app, ["generate", "--help"])
-    assert result.exit_code == 0
-    assert "openai" in result.stdout.lower()
+    assert "openai" in help_texts["generate"].lower()
 
 
-def test_dump_command_help() -> None:
+def test_dump_command_help(help_texts: dict[str, str]) -> None:
     """Test dump command help."""
-    result = runner.invoke(app, ["dump", "--help"])
-    assert result.exit_code == 0
-    assert "csv" in result.stdout.lower() or "export" in result.stdout.lower()
+    text = help_texts["dump"].lower()
+    assert "csv" in text or "export" in text
 
 
-def test_sync_command_help() -> None:
+def test_sync_command_help(help_texts: dict[str, str]) -> None:
     """Test sync-to-anki command help."""
-    result = runner.invoke(app, ["sync-to-anki", "--help"])
-    assert result.exit_code == 0
-    assert "anki" in result.stdout.lower()
+    assert "anki" in help_texts["sync-to-anki"].lower()
+
+
+def test_importing_cli_does_not_import_openai() -> None:
+    """Test that the OpenAI SDK is only imported by commands that need it."""
+    # A fresh interpreter: in this process other tests may already have imported it
+    code = (
+        "import sys, anki_cards_from_kindle_highlights.cli; "
+        "sys.exit('openai' in sys.modules)"
+    )
+    # Import the source tree under test, not an installed copy of the package
+    src_dir = Path(__file__).resolve().parents[1] / "src"
+    env = {**os.environ, "PYTHONPATH": str(src_dir)}
+    result = subprocess.run([sys.executable, "-c", code], env=env, check=False)
+    assert result.returncode == 0
@@ -3,26 +3,31 @@
 from datetime import datetime
 from pathlib import Path
 
+import pytest
+
 from anki_cards_from_kindle_highlights.clippings import (
     Clipping,
     ClippingType,
     parse_clippings_file,
+    parse_clippings_text,
 )
 
 
 class TestParseClippingsFile:
     """Tests for parse_clippings_file function."""
 
-    def test_parse_valid_file(self, sample_clippings_file: Path) -> None:
+    def test_parse_valid_file(self, parsed_sample_clippings: list[Clipping]) -> None:
         """Test parsing a valid clippings file."""
-        clippings = parse_clippings_file(sample_clippings_file)
+        clippings = parsed_sample_clippings
 
         # Should have 3 entries (2 highlights + 1 bookmark)
         assert len(clippings) == 3
 
-    def test_parse_highlights_content(self, sample_clippings_file: Path) -> None:
+    def test_parse_highlights_content(
+        self, parsed_sample_clippings: list[Clipping]
+    ) -> None:
         """Test that highlights have correct content."""
-        clippings = parse_clippings_file(sample_clippings_file)
+        clippings = parsed_sample_clippings
         highlights = [c for c in clippings if c.clipping_type == ClippingType.HIGHLIGHT]
 
         assert len(highlights) == 2
@@ -32,32 +37,32 @@ class TestParseClippingsFile:
             == "Another sample highlight with some interesting content."
         )
 
-    def test_parse_book_and_author(self, sample_clippings_file: Path) -> None:
-        """Test that book title and author are parsed correctly."""
-        clippings = parse_clippings_file(sample_clippings_file)
-
-        assert clippings[0].book_title == "Test Book"
-        assert clippings[0].author == "Test Author"
-        assert clippings[1].book_title == "Another Book"
-        assert clippings[1].author == "Another Author"
-
-    def test_parse_location(self, sample_clippings_file: Path) -> None:
-        """Test that location is parsed correctly."""
-        clippings = parse_clippings_file(sample_clippings_file)
-
-        assert clippings[0].location_start == 100
-        assert clippings[0].location_end == 150
-        assert clippings[0].page == 42
-
-    def test_parse_date(self, sample_clippings_file: Path) -> None:
-        """Test that date is parsed correctly."""
-        clippings = parse_clippings_file(sample_clippings_file)
-
-        assert clippings[0].date_added == datetime(2024, 1, 15, 10, 30, 0)
-
-    def test_parse_bookmark(self, sample_clippings_file: Path) -> None:
+    @pytest.mark.parametrize(
+        ("idx", "field", "expected"),
+        [
+            (0, "book_title", "Test Book"),
+            (0, "author", "Test Author"),
+            (0, "location_start", 100),
+            (0, "location_end", 150),
+            (0, "page", 42),
+            (0, "date_added", datetime(2024, 1, 15, 10, 30, 0)),
+            (1, "book_title", "Another Book"),
+            (1, "author", "Another Author"),
+        ],
+    )
+    def test_parsed_fields(
+        self,
+        parsed_sample_clippings: list[Clipping],
+        idx: int,
+        field: str,
+        expected: object,
+    ) -> None:
+        """Test that metadata fields are parsed correctly."""
+        assert getattr(parsed_sample_clippings[idx], field) == expected
+
+    def test_parse_bookmark(self, parsed_sample_clippings: list[Clipping]) -> None:
         """Test that bookmarks are parsed correctly."""
-        clippings = parse_clippings_file(sample_clippings_file)
+        clippings = parsed_sample_clippings
         bookmarks = [c for c in clippings if c.clipping_type == ClippingType.BOOKMARK]
 
         assert len(bookmarks) == 1
@@ -77,7 +82,11 @@ class TestParseClippingsFile:
         clippings = parse_clippings_file(empty_file)
         assert clippings == []
 
-    def test_parse_title_with_parentheses(self, tmp_path: Path) -> None:
+
+class TestParseClippingsText:
+    """Tests for parse_clippings_text function."""
+
+    def test_parse_title_with_parentheses(self) -> None:
         """Test parsing a title that contains parentheses."""
         content = """Book Title (Series Name) (Author Name)
 - Your Highlight on page 1 | location 10-20 | Added on Monday, 1 January 2024 12:00:00
@@ -85,14 +94,26 @@ class TestParseClippingsFile:
 Test content.
 ==========
 """
-        file_path = tmp_path / "clippings.txt"
-        file_path.write_text(content, encoding="utf-8-sig")
-
-        clippings = parse_clippings_file(file_path)
+        clippings = parse_clippings_text(content)
         assert len(clippings) == 1
         assert clippings[0].book_title == "Book Title (Series Name)"
         assert clippings[0].author == "Author Name"
 
+    def test_strips_leading_bom(self) -> None:
+        """Test that a BOM left in already-decoded text doesn't end up in the title."""
+        content = """\ufeffSome Book (Some Author)
+- Your Highlight at location 5-6 | Added on Monday, 1 January 2024 12:00:00
+
+Text.
+==========
+"""
+        clippings = parse_clippings_text(content)
+        assert clippings[0].book_title == "Some Book"
+
+    def test_empty_text(self) -> None:
+        """Test that empty text yields no clippings."""
+        assert parse_clippings_text("") == []
+
 
 class TestClippingDataclass:
     """Tests for the Clipping dataclass."""
@@ -1,12 +1,42 @@
 """Tests for database operations."""
 
+from dataclasses import replace
+
+import pytest
+
 from anki_cards_from_kindle_highlights.clippings import Clipping
 from anki_cards_from_kindle_highlights.db import ClippingsDatabase
 
 
+@pytest.fixture
+def seeded_db(
+    temp_db: ClippingsDatabase, sample_clippings: list[Clipping]
+) -> ClippingsDatabase:
+    """temp_db pre-seeded with sample_clippings (rolled back after the test)."""
+    temp_db.insert_clippings(sample_clippings)
+    return temp_db
+
+
+@pytest.fixture
+def seeded_ids(seeded_db: ClippingsDatabase) -> list[int]:
+    """Row IDs of the clippings in seeded_db, in insertion order."""
+    return [record.id for record in seeded_db.get_all_records()]
+
+
 class TestClippingsDatabase:
     """Tests for ClippingsDatabase class."""
 
+    def test_schema_indexes(self, temp_db: ClippingsDatabase) -> None:
+        """Test that the status columns used for filtering are indexed."""
+        rows = temp_db._get_connection().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?",
+            ("clippings",),
+        )
+        names = {row["name"] for row in rows}
+
+        assert "ix_clippings_pattern" in names
+        assert "ix_clippings_synced_to_anki" in names
+
     def test_insert_clipping(
         self, temp_db: ClippingsDatabase, sample_clipping: Clipping
     ) -> None:
@@ -26,15 +56,29 @@ class TestClippingsDatabase:
         assert row_id1 is not None
         assert row_id2 is None  # Duplicate should return None
 
-    def test_get_all_records(
+    def test_insert_clippings(
         self, temp_db: ClippingsDatabase, sample_clippings: list[Clipping]
     ) -> None:
-        """Test getting all records from the database."""
-        for clipping in sample_clippings:
-            temp_db.insert_clipping(clipping)
+        """Test bulk inserting clippings, with duplicates reported as None."""
+        row_ids = temp_db.insert_clippings(sample_clippings)
 
-        records = temp_db.get_all_records()
+        assert len(row_ids) == 3
+        assert all(row_id is not None for row_id in row_ids)
+        assert len(set(row_ids)) == 3
+
+        # Re-inserting a mix of new and existing clippings
+        new_clipping = replace(sample_clippings[0], content="Brand new content.")
+        row_ids = temp_db.insert_clippings([sample_clippings[1], new_clipping])
+
+        assert row_ids[0] is None
+        assert row_ids[1] is not None
+        assert temp_db.count_all() == 4
+
+    def test_get_all_records(self, seeded_db: ClippingsDatabase) -> None:
+        """Test getting all records from the database."""
+        records = seeded_db.get_all_records()
         assert len(records) == 3
+        assert seeded_db.count_all() == 3
 
     def test_get_record_by_id(
         self, temp_db: ClippingsDatabase, sample_clipping: Clipping
@@ -95,14 +139,9 @@ class TestClippingsDatabase:
         assert record is not None
         assert record.synced_to_anki is True
 
-    def test_get_books_with_unprocessed(
-        self, temp_db: ClippingsDatabase, sample_clippings: list[Clipping]
-    ) -> None:
+    def test_get_books_with_unprocessed(self, seeded_db: ClippingsDatabase) -> None:
         """Test getting books with unprocessed clippings."""
-        for clipping in sample_clippings:
-            temp_db.insert_clipping(clipping)
-
-        books = temp_db.get_books_with_unprocessed()
+        books = seeded_db.get_books_with_unprocessed()
 
         assert len(books) == 2  # Book One and Book Two
         # Books should be (title, author, count) tuples
@@ -110,28 +149,35 @@ class TestClippingsDatabase:
         assert book_dict[("Book One", "Author One")] == 2
         assert book_dict[("Book Two", "Author Two")] == 1
 
-    def test_get_unprocessed_clippings(
-        self, temp_db: ClippingsDatabase, sample_clippings: list[Clipping]
-    ) -> None:
+    def test_get_unprocessed_clippings(self, seeded_db: ClippingsDatabase) -> None:
         """Test getting unprocessed clippings."""
-        for clipping in sample_clippings:
-            temp_db.insert_clipping(clipping)
-
-        unprocessed = temp_db.get_unprocessed_clippings()
+        unprocessed = seeded_db.get_unprocessed_clippings()
         assert len(unprocessed) == 3
 
     def test_get_unprocessed_clippings_filtered(
-        self, temp_db: ClippingsDatabase, sample_clippings: list[Clipping]
+        self, seeded_db: ClippingsDatabase
     ) -> None:
         """Test getting unprocessed clippings filtered by book."""
-        for clipping in sample_clippings:
-            temp_db.insert_clipping(clipping)
-
-        unprocessed = temp_db.get_unprocessed_clippings(
+        unprocessed = seeded_db.get_unprocessed_clippings(
             books=[("Book One", "Author One")]
         )
         assert len(unprocessed) == 2
 
+    def test_get_unprocessed_clippings_many_books(
+        self, temp_db: ClippingsDatabase, sample_clipping: Clipping
+    ) -> None:
+        """Test filtering by more books than fit in one query's variables."""
+        books = [(f"Book {i}", f"Author {i}") for i in range(600)]
+        temp_db.insert_clippings(
+            replace(sample_clipping, book_title=title, author=author)
+            for title, author in books
+        )
+
+        unprocessed = temp_db.get_unprocessed_clippings(books=books + books[:1])
+
+        assert len(unprocessed) == 600
+        assert {(r.book_title, r.author) for r in unprocessed} == set(books)
+
     def test_get_unsynced_cards(
         self, temp_db: ClippingsDatabase, sample_clipping: Clipping
     ) -> None:
@@ -140,22 +186,33 @@ class TestClippingsDatabase:
         assert row_id is not None
 
         # No unsynced cards initially (no pattern set)
-        unsynced = temp_db.get_unsynced_cards()
-        assert len(unsynced) == 0
+        assert temp_db.count_unsynced() == 0
 
         # Set pattern
         temp_db.update_card_data(row_id, "MENTAL_MODEL", "Front", "Back")
 
         # Now should have one unsynced card
         unsynced = temp_db.get_unsynced_cards()
-        assert len(unsynced) == 1
+        assert [record.id for record in unsynced] == [row_id]
+        assert temp_db.count_unsynced() == 1
 
         # Mark as synced
         temp_db.mark_synced(row_id)
 
         # Now should have no unsynced cards
-        unsynced = temp_db.get_unsynced_cards()
-        assert len(unsynced) == 0
+        assert temp_db.count_unsynced() == 0
+        assert temp_db.count_synced() == 1
+
+    def test_skip_cards_are_never_unsynced(
+        self, temp_db: ClippingsDatabase, sample_clipping: Clipping
+    ) -> None:
+        """Test that SKIP results are not counted as cards waiting to sync."""
+        row_id = temp_db.insert_clipping(sample_clipping)
+        assert row_id is not None
+        temp_db.update_card_data(row_id, "SKIP", None, None)
+
+        assert temp_db.count_unsynced() == 0
+        assert temp_db.get_unsynced_cards() == []
 
     def test_reset_all_generations(
         self, temp_db: ClippingsDatabase, sample_clipping: Clipping
@@ -196,69 +253,116 @@ class TestClippingsDatabase:
         # But pattern should still be set
         assert record.pattern == "MENTAL_MODEL"
 
-    def test_get_unique_books(
-        self, temp_db: ClippingsDatabase, sample_clippings: list[Clipping]
-    ) -> None:
+    def test_get_unique_books(self, seeded_db: ClippingsDatabase) -> None:
         """Test getting unique books."""
-        for clipping in sample_clippings:
-            temp_db.insert_clipping(clipping)
-
-        books = temp_db.get_unique_books()
+        books = seeded_db.get_unique_books()
         assert len(books) == 2
         assert ("Book One", "Author One") in books
         assert ("Book Two", "Author Two") in books
 
-    def test_get_clippings_for_book(
-        self, temp_db: ClippingsDatabase, sample_clippings: list[Clipping]
-    ) -> None:
+    def test_get_clippings_for_book(self, seeded_db: ClippingsDatabase) -> None:
         """Test getting clippings for a specific book."""
-        for clipping in sample_clippings:
-            temp_db.insert_clipping(clipping)
-
-        clippings = temp_db.get_clippings_for_book("Book One", "Author One")
+        clippings = seeded_db.get_clippings_for_book("Book One", "Author One")
         assert len(clippings) == 2
 
+    def test_book_filters_with_quotes(
+        self, temp_db: ClippingsDatabase, sample_clipping: Clipping
+    ) -> None:
+        """Test that book filters bind titles containing quotes as parameters."""
+        clipping = replace(
+            sample_clipping, book_title='Schrödinger\'s "Cat"', author="O'Brien"
+        )
+        temp_db.insert_clipping(clipping)
+        book = (clipping.book_title, clipping.author)
+
+        assert len(temp_db.get_clippings_for_book(*book)) == 1
+        assert len(temp_db.get_unprocessed_clippings(books=[book])) == 1
+
     def test_get_synced_records(
-        self, temp_db: ClippingsDatabase, sample_clippings: list[Clipping]
+        self, seeded_db: ClippingsDatabase, seeded_ids: list[int]
     ) -> None:
         """Test getting synced records."""
-        ids = []
-        for clipping in sample_clippings:
-            row_id = temp_db.insert_clipping(clipping)
-            if row_id:
-                ids.append(row_id)
+        ids = seeded_ids
 
         # Mark first two as synced
-        temp_db.update_card_data(ids[0], "PATTERN", "F", "B")
-        temp_db.update_card_data(ids[1], "PATTERN", "F", "B")
-        temp_db.mark_synced(ids[0])
-        temp_db.mark_synced(ids[1])
+        seeded_db.update_card_data_many([(i, "PATTERN", "F", "B") for i in ids[:2]])
+        seeded_db.mark_synced_many(ids[:2])
 
-        synced = temp_db.get_synced_records()
+        synced = seeded_db.get_synced_records()
         assert len(synced) == 2
+        assert seeded_db.count_synced() == 2
 
     def test_reset_generations_for_ids(
-        self, temp_db: ClippingsDatabase, sample_clippings: list[Clipping]
+        self, seeded_db: ClippingsDatabase, seeded_ids: list[int]
     ) -> None:
         """Test resetting generations for specific IDs."""
-        ids = []
-        for clipping in sample_clippings:
-            row_id = temp_db.insert_clipping(clipping)
-            if row_id:
-                ids.append(row_id)
-                temp_db.update_card_data(row_id, "PATTERN", "F", "B")
-                temp_db.mark_synced(row_id)
+        ids = seeded_ids
+        seeded_db.update_card_data_many([(i, "PATTERN", "F", "B") for i in ids])
+        seeded_db.mark_synced_many(ids)
 
         # Reset only first two
-        affected = temp_db.reset_generations_for_ids([ids[0], ids[1]])
+        affected = seeded_db.reset_generations_for_ids([ids[0], ids[1]])
         assert affected == 2
 
         # First two should be reset
-        record1 = temp_db.get_record_by_id(ids[0])
+        record1 = seeded_db.get_record_by_id(ids[0])
         assert record1 is not None
         assert record1.pattern is None
 
         # Third should still have pattern
-        record3 = temp_db.get_record_by_id(ids[2])
+        record3 = seeded_db.get_record_by_id(ids[2])
         assert record3 is not None
         assert record3.pattern == "PATTERN"
+
+    def test_reset_generations_for_many_ids(
+        self, temp_db: ClippingsDatabase, sample_clipping: Clipping
+    ) -> None:
+        """Test resetting more IDs than fit in one SQL statement's variables."""
+        clippings = [
+            replace(sample_clipping, content=f"Content {i}") for i in range(1200)
+        ]
+        ids = [row_id for row_id in temp_db.insert_clippings(clippings) if row_id]
+        temp_db.update_card_data_many([(i, "PATTERN", "F", "B") for i in ids])
+
+        affected = temp_db.reset_generations_for_ids(ids)
+
+        assert affected == 1200
+        assert temp_db.get_generated_records() == []
+
+    def test_transaction_commits_once(self, sample_clippings: list[Clipping]) -> None:
+        """Test that writes inside transaction() are committed together."""
+        # A private database: temp_db itself runs inside a transaction
+        db = ClippingsDatabase(":memory:")
+        with db.transaction():
+            row_ids = db.insert_clippings(sample_clippings)
+            assert row_ids[0] is not None
+            db.update_card_data(row_ids[0], "PATTERN", "F", "B")
+            # Still inside the transaction: nothing committed yet
+            assert db._get_connection().in_transaction
+
+        assert not db._get_connection().in_transaction
+        assert len(db.get_generated_records()) == 1
+        db.close()
+
+    def test_transaction_rolls_back_on_error(
+        self, temp_db: ClippingsDatabase, sample_clippings: list[Clipping]
+    ) -> None:
+        """Test that an exception inside transaction() discards all its writes."""
+        with pytest.raises(RuntimeError), temp_db.transaction():
+            temp_db.insert_clippings(sample_clippings)
+            raise RuntimeError("boom")
+
+        assert temp_db.get_all_records() == []
+
+    def test_nested_transaction_rolls_back_inner_only(
+        self, temp_db: ClippingsDatabase, sample_clippings: list[Clipping]
+    ) -> None:
+        """Test that a failing nested block keeps the outer block's writes."""
+        with temp_db.transaction():
+            temp_db.insert_clipping(sample_clippings[0])
+            with pytest.raises(RuntimeError), temp_db.transaction():
+                temp_db.insert_clipping(sample_clippings[1])
+                raise RuntimeError("boom")
+
+        records = temp_db.get_all_records()
+        assert [r.content for r in records] == [sample_clippings[0].content]
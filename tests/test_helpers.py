@@ -1,54 +1,57 @@
 """Tests for CLI helper functions."""
 
+import pytest
+
 from anki_cards_from_kindle_highlights.cli.helpers import abbreviate, get_prompt
 
 
 class TestAbbreviate:
     """Tests for the abbreviate function."""
 
-    def test_short_text_unchanged(self) -> None:
-        """Test that short text is not abbreviated."""
-        text = "Short text"
-        result = abbreviate(text, max_len=50)
-        assert result == "Short text"
-
-    def test_long_text_abbreviated(self) -> None:
-        """Test that long text is abbreviated with ellipsis."""
-        text = "This is a very long text that should be abbreviated"
-        result = abbreviate(text, max_len=20)
-
-        assert len(result) == 20
-        assert result.endswith("...")
-
-    def test_exact_length_unchanged(self) -> None:
-        """Test that text at exact max length is unchanged."""
-        text = "Exactly ten"  # 11 chars
-        result = abbreviate(text, max_len=11)
-        assert result == text
+    @pytest.mark.parametrize(
+        ("text", "max_len", "expected"),
+        [
+            ("Short text", 50, "Short text"),
+            # Text at exactly max length is unchanged
+            ("Exactly ten", 11, "Exactly ten"),
+            # Long text is cut to max_len, ending in an ellipsis
+            (
+                "This is a very long text that should be abbreviated",
+                20,
+                "This is a very lo...",
+            ),
+            (None, 50, ""),
+            # Newlines are replaced with spaces
+            ("Line one\nLine two\nLine three", 100, "Line one Line two Line three"),
+            ("Windows\r\nline", 100, "Windows line"),
+            ("Old Mac\rline", 100, "Old Mac line"),
+            # Leading/trailing whitespace is stripped
+            ("  text with spaces  ", 50, "text with spaces"),
+        ],
+        ids=[
+            "short",
+            "exact-length",
+            "long",
+            "none",
+            "newlines",
+            "crlf",
+            "cr",
+            "whitespace",
+        ],
+    )
+    def test_abbreviate(self, text: str | None, max_len: int, expected: str) -> None:
+        """Test abbreviating text to a maximum length."""
+        result = abbreviate(text, max_len=max_len)
 
-    def test_none_returns_empty(self) -> None:
-        """Test that None input returns empty string."""
-        result = abbreviate(None)
-        assert result == ""
-
-    def test_newlines_removed(self) -> None:
-        """Test that newlines are replaced with spaces."""
-        text = "Line one\nLine two\nLine three"
-        result = abbreviate(text, max_len=100)
-        assert "\n" not in result
-        assert result == "Line one Line two Line three"
-
-    def test_whitespace_stripped(self) -> None:
-        """Test that leading/trailing whitespace is stripped."""
-        text = "  text with spaces  "
-        result = abbreviate(text)
-        assert result == "text with spaces"
+        assert result == expected
+        assert len(result) <= max_len
 
     def test_default_max_len(self) -> None:
         """Test the default max_len of 50."""
         text = "x" * 100
         result = abbreviate(text)
         assert len(result) == 50
+        assert result.endswith("...")
 
 
 class TestGetPrompt:
@@ -65,3 +68,7 @@ class TestGetPrompt:
         prompt = get_prompt()
         # The prompt should mention Anki cards or similar
         assert "anki" in prompt.lower() or "card" in prompt.lower()
+
+    def test_prompt_is_cached(self) -> None:
+        """Test that the prompt file is read once and the result reused."""
+        assert get_prompt() is get_prompt()
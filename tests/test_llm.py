@@ -1,9 +1,13 @@
 """Tests for LLM integration with mocked OpenAI."""
 
-import json
+import dataclasses
 from datetime import datetime
+from typing import Any
+from unittest.mock import MagicMock
 
+import orjson
 import pytest
+from pydantic import ValidationError
 
 from anki_cards_from_kindle_highlights.clippings import ClippingType
 from anki_cards_from_kindle_highlights.db import ClippingRecord
@@ -13,13 +17,19 @@ from anki_cards_from_kindle_highlights.llm import (
     GenerationResult,
     _create_batch_request,
     _get_response_schema,
+    _is_empty,
     create_batch_jsonl,
+    retrieve_batch_results,
 )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_record() -> ClippingRecord:
-    """Create a sample ClippingRecord for testing."""
+    """Create a sample ClippingRecord for testing.
+
+    Shared by the whole module, so tests must not modify it; use
+    dataclasses.replace to get a changed copy.
+    """
     return ClippingRecord(
         id=1,
         book_title="Test Book",
@@ -66,40 +76,41 @@ class TestAnkiCardLLMResponse:
         assert response.front is None
         assert response.back is None
 
-    def test_all_valid_patterns(self) -> None:
+    def test_rejects_unknown_fields(self) -> None:
+        """Test that fields outside the schema are rejected."""
+        with pytest.raises(ValidationError):
+            AnkiCardLLMResponse.model_validate(
+                {"pattern": "TACTIC", "front": "F", "back": "B", "extra": "x"}
+            )
+
+    def test_is_frozen(self) -> None:
+        """Test that a parsed card can't be modified."""
+        response = AnkiCardLLMResponse(pattern="TACTIC", front="F", back="B")
+
+        with pytest.raises(ValidationError):
+            response.front = "Changed"
+
+    @pytest.mark.parametrize(
+        "pattern",
+        [
+            "DISTINCTION",
+            "MENTAL_MODEL",
+            "METAPHOR",
+            "FRAMEWORK",
+            "TACTIC",
+            "CASE_STUDY",
+            "DEFINITION",
+            "SKIP",
+        ],
+    )
+    def test_all_valid_patterns(self, pattern: str) -> None:
         """Test all valid pattern values."""
-        assert (
-            AnkiCardLLMResponse(pattern="DISTINCTION", front="F", back="B").pattern
-            == "DISTINCTION"
-        )
-        assert (
-            AnkiCardLLMResponse(pattern="MENTAL_MODEL", front="F", back="B").pattern
-            == "MENTAL_MODEL"
-        )
-        assert (
-            AnkiCardLLMResponse(pattern="METAPHOR", front="F", back="B").pattern
-            == "METAPHOR"
-        )
-        assert (
-            AnkiCardLLMResponse(pattern="FRAMEWORK", front="F", back="B").pattern
-            == "FRAMEWORK"
-        )
-        assert (
-            AnkiCardLLMResponse(pattern="TACTIC", front="F", back="B").pattern
-            == "TACTIC"
-        )
-        assert (
-            AnkiCardLLMResponse(pattern="CASE_STUDY", front="F", back="B").pattern
-            == "CASE_STUDY"
-        )
-        assert (
-            AnkiCardLLMResponse(pattern="DEFINITION", front="F", back="B").pattern
-            == "DEFINITION"
-        )
-        assert (
-            AnkiCardLLMResponse(pattern="SKIP", front="F", back="B").pattern == "SKIP"
+        response = AnkiCardLLMResponse.model_validate(
+            {"pattern": pattern, "front": "F", "back": "B"}
         )
 
+        assert response.pattern == pattern
+
 
 class TestGenerationResult:
     """Tests for the GenerationResult dataclass."""
@@ -173,6 +184,10 @@ class TestGetResponseSchema:
         assert "front" in schema["properties"]
         assert "back" in schema["properties"]
 
+    def test_schema_is_cached(self) -> None:
+        """Test that the schema is built once and reused."""
+        assert _get_response_schema() is _get_response_schema()
+
 
 class TestCreateBatchRequest:
     """Tests for _create_batch_request function."""
@@ -181,26 +196,28 @@ class TestCreateBatchRequest:
         """Test creating a valid batch request."""
         request = _create_batch_request(sample_record, "Test prompt", "gpt-4o")
 
-        assert request is not None
         assert request["custom_id"] == "1"
         assert request["method"] == "POST"
         assert request["url"] == "/v1/chat/completions"
         assert "body" in request
 
-    def test_returns_none_for_empty_content(
-        self, sample_record: ClippingRecord
+    @pytest.mark.parametrize(
+        ("content", "expected"),
+        [("", True), ("  \n ", True), ("Text", False)],
+        ids=["empty", "whitespace", "text"],
+    )
+    def test_is_empty(
+        self, sample_record: ClippingRecord, content: str, expected: bool
     ) -> None:
-        """Test that None is returned for empty content."""
-        sample_record.content = ""
-        request = _create_batch_request(sample_record, "Test prompt", "gpt-4o")
+        """Test which records count as having no content to send."""
+        record = dataclasses.replace(sample_record, content=content)
 
-        assert request is None
+        assert _is_empty(record) is expected
 
     def test_request_body_structure(self, sample_record: ClippingRecord) -> None:
         """Test the structure of the request body."""
         request = _create_batch_request(sample_record, "System prompt", "gpt-4o")
 
-        assert request is not None
         body = request["body"]
         assert body["model"] == "gpt-4o"
         assert len(body["messages"]) == 2
@@ -208,6 +225,16 @@ class TestCreateBatchRequest:
         assert body["messages"][0]["content"] == "System prompt"
         assert body["messages"][1]["role"] == "user"
 
+    def test_requests_share_unchanging_parts(
+        self, sample_record: ClippingRecord
+    ) -> None:
+        """Test that the system message and response format are built only once."""
+        first = _create_batch_request(sample_record, "System prompt", "gpt-4o")
+        second = _create_batch_request(sample_record, "System prompt", "gpt-4o")
+
+        assert first["body"]["messages"][0] is second["body"]["messages"][0]
+        assert first["body"]["response_format"] is second["body"]["response_format"]
+
 
 class TestCreateBatchJsonl:
     """Tests for create_batch_jsonl function."""
@@ -221,19 +248,18 @@ class TestCreateBatchJsonl:
         assert ids[0] == 1
 
         # Verify JSONL is valid
-        lines = jsonl.strip().split("\n")
+        lines = jsonl.splitlines()
         assert len(lines) == 1
-        parsed = json.loads(lines[0])
+        parsed = orjson.loads(lines[0])
         assert parsed["custom_id"] == "1"
 
     def test_skips_empty_content(self, sample_record: ClippingRecord) -> None:
         """Test that records with empty content are skipped."""
-        sample_record.content = ""
-        records = [sample_record]
+        records = [dataclasses.replace(sample_record, content="")]
         jsonl, ids = create_batch_jsonl(records, "Prompt", "gpt-4o")
 
         assert len(ids) == 0
-        assert jsonl == ""
+        assert jsonl == b""
 
     def test_multiple_records(self, sample_record: ClippingRecord) -> None:
         """Test creating JSONL with multiple records."""
@@ -259,5 +285,102 @@ class TestCreateBatchJsonl:
         jsonl, ids = create_batch_jsonl(records, "Prompt", "gpt-4o")
 
         assert len(ids) == 2
-        lines = jsonl.strip().split("\n")
+        lines = jsonl.splitlines()
         assert len(lines) == 2
+
+    def test_groups_records(self, sample_record: ClippingRecord) -> None:
+        """Test that group_size puts several records in one request."""
+        records = [
+            sample_record,
+            dataclasses.replace(sample_record, id=2, content="Second highlight."),
+            dataclasses.replace(sample_record, id=3, content=""),
+        ]
+        jsonl, ids = create_batch_jsonl(records, "Prompt", "gpt-4o", group_size=2)
+
+        assert ids == [1, 2]
+        lines = jsonl.splitlines()
+        assert len(lines) == 1
+        request = orjson.loads(lines[0])
+        assert request["custom_id"] == "group:1,2"
+        messages = request["body"]["messages"]
+        assert messages[0]["content"] == "Prompt"
+        assert "[1] Book: Test Book" in messages[1]["content"]
+        assert "[2] Book: Test Book" in messages[1]["content"]
+        schema = request["body"]["response_format"]["json_schema"]["schema"]
+        assert schema["properties"]["cards"]["type"] == "array"
+
+
+def _batch_output_line(custom_id: str, content: str) -> bytes:
+    """Build one line of batch output whose message content is `content`."""
+    response: dict[str, Any] = {
+        "custom_id": custom_id,
+        "response": {"body": {"choices": [{"message": {"content": content}}]}},
+        "error": None,
+    }
+    return orjson.dumps(response)
+
+
+class TestRetrieveBatchResults:
+    """Tests for retrieve_batch_results with a mocked OpenAI client."""
+
+    def test_parses_cards_and_reports_invalid_ones(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that valid cards are parsed and invalid ones become errors."""
+        client = MagicMock()
+        client.batches.retrieve.return_value.status = "completed"
+        client.files.content.return_value.content = b"\n".join(
+            [
+                _batch_output_line(
+                    "1", '{"pattern": "TACTIC", "front": "Q", "back": "A"}'
+                ),
+                _batch_output_line(
+                    "2", '{"pattern": "NOT_A_PATTERN", "front": null, "back": null}'
+                ),
+                _batch_output_line("3", "not json"),
+            ]
+        )
+        monkeypatch.setattr(
+            "anki_cards_from_kindle_highlights.llm._get_sync_client",
+            lambda _api_key: client,
+        )
+
+        results = retrieve_batch_results("test-key", "batch_123")
+
+        assert [result.record_id for result in results] == [1, 2, 3]
+        assert results[0].card == AnkiCardLLMResponse(
+            pattern="TACTIC", front="Q", back="A"
+        )
+        for result in results[1:]:
+            assert result.card is None
+            assert result.error is not None
+            assert result.error.startswith("Failed to parse response")
+
+    def test_splits_grouped_response(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a grouped response yields one result per record."""
+        cards = {
+            "cards": [
+                {"id": 2, "pattern": "SKIP", "front": None, "back": None},
+                {"id": 1, "pattern": "TACTIC", "front": "Q", "back": "A"},
+            ]
+        }
+        client = MagicMock()
+        client.batches.retrieve.return_value.status = "completed"
+        client.files.content.return_value.content = _batch_output_line(
+            "group:1,2,3", orjson.dumps(cards).decode()
+        )
+        monkeypatch.setattr(
+            "anki_cards_from_kindle_highlights.llm._get_sync_client",
+            lambda _api_key: client,
+        )
+
+        results = retrieve_batch_results("test-key", "batch_123")
+
+        assert [result.record_id for result in results] == [1, 2, 3]
+        assert results[0].card == AnkiCardLLMResponse(
+            pattern="TACTIC", front="Q", back="A"
+        )
+        assert results[1].card is not None
+        assert results[1].card.pattern == "SKIP"
+        assert results[2].card is None
+        assert results[2].error is not None
@@ -1,12 +1,16 @@
 """Tests for text matching functionality."""
 
+import string
+
 import pytest
 
 from anki_cards_from_kindle_highlights.matcher import (
+    _SKELETON_TABLE,
     AmbiguousMatchException,
     BookMatcher,
     MatchResult,
     NoMatchException,
+    _skeleton_only,
     _skeletonize,
 )
 
@@ -42,14 +46,35 @@ class TestSkeletonize:
         skeleton, index_map = _skeletonize(text)
 
         assert skeleton == "abc"
-        assert index_map == [0, 2, 4]  # Positions of A, B, C in original
+        assert list(index_map) == [0, 2, 4]  # Positions of A, B, C in original
+
+    def test_underscores_are_dropped(self) -> None:
+        """Test that underscores are dropped like other punctuation."""
+        text = "snake_case x"
+        skeleton, index_map = _skeletonize(text)
+
+        assert skeleton == "snakecasex"
+        assert list(index_map) == [0, 1, 2, 3, 4, 6, 7, 8, 9, 11]
+
+    def test_ascii_fast_path_matches_general_path(self) -> None:
+        """Test that ASCII text gets the same skeleton as the general path."""
+        text = string.printable * 2
+        skeleton, index_map = _skeletonize(text)
+
+        assert skeleton == text.translate(_SKELETON_TABLE)
+        assert len(index_map) == len(skeleton)
+
+    @pytest.mark.parametrize("text", ["Hello, World!", "Café résumé", "İstanbul", ""])
+    def test_skeleton_only_matches_skeletonize(self, text: str) -> None:
+        """Test that _skeleton_only gives the skeleton _skeletonize does."""
+        assert _skeleton_only(text) == _skeletonize(text)[0]
 
     def test_empty_string(self) -> None:
         """Test skeletonization of empty string."""
         skeleton, index_map = _skeletonize("")
 
         assert skeleton == ""
-        assert index_map == []
+        assert len(index_map) == 0
 
     def test_no_alphanumeric(self) -> None:
         """Test text with no alphanumeric characters."""
@@ -57,7 +82,7 @@ class TestSkeletonize:
         skeleton, index_map = _skeletonize(text)
 
         assert skeleton == ""
-        assert index_map == []
+        assert len(index_map) == 0
 
     def test_unicode_characters(self) -> None:
         """Test handling of unicode characters."""
@@ -68,6 +93,14 @@ class TestSkeletonize:
         assert "caf" in skeleton
         assert "r" in skeleton
 
+    def test_index_map_aligned_with_skeleton(self) -> None:
+        """Test that characters lowercasing to several characters keep alignment."""
+        text = "İstanbul, İzmir"  # "İ".lower() is two characters
+        skeleton, index_map = _skeletonize(text)
+
+        assert len(skeleton) == len(index_map)
+        assert index_map[-5] == text.index("İzmir")
+
 
 class SimpleClipping:
     """Simple mock clipping for testing."""
@@ -76,33 +109,65 @@ class SimpleClipping:
         self.content = content
 
 
+@pytest.fixture(scope="class")
+def matcher() -> BookMatcher:
+    """A BookMatcher shared by a test class.
+
+    Each test sets its own text; assigning _text drops the previous skeleton.
+    """
+    return BookMatcher("Author", "Title", None)
+
+
 class TestBookMatcher:
     """Tests for the BookMatcher class."""
 
-    def test_exact_match(self) -> None:
-        """Test exact matching of a clipping in book text."""
-        matcher = BookMatcher("Test Author", "Test Book", None)
-        matcher._text = (
-            "This is the book text with a specific phrase that we want to match."
-        )
-
-        result = matcher.match(SimpleClipping("specific phrase"))
+    @pytest.mark.parametrize(
+        ("text", "query", "expected"),
+        [
+            (
+                "This is the book text with a specific phrase that we want to match.",
+                "specific phrase",
+                "specific phrase",
+            ),
+            # No comma in the clipping
+            (
+                "The quick, brown fox jumps over the lazy dog.",
+                "quick brown fox",
+                "quick, brown fox",
+            ),
+            (
+                "The QUICK Brown Fox Jumps Over The Lazy Dog.",
+                "quick brown fox",
+                "QUICK Brown Fox",
+            ),
+            (
+                "Un café, s'il vous plaît. Merci beaucoup.",
+                "s'il vous plaît",
+                "s'il vous plaît",
+            ),
+        ],
+        ids=["exact", "punctuation-differences", "case-differences", "non-ascii-text"],
+    )
+    def test_match(
+        self, matcher: BookMatcher, text: str, query: str, expected: str
+    ) -> None:
+        """Test that a clipping is matched to its span in the book text."""
+        matcher._text = text
+
+        result = matcher.match(SimpleClipping(query))
 
         assert isinstance(result, MatchResult)
-        assert result.start > 0
-        assert result.length > 0
+        assert text[result.start : result.start + result.length] == expected
 
-    def test_no_match_raises_exception(self) -> None:
+    def test_no_match_raises_exception(self, matcher: BookMatcher) -> None:
         """Test that NoMatchException is raised when no match is found."""
-        matcher = BookMatcher("Author", "Title", None)
         matcher._text = "This is the book text."
 
         with pytest.raises(NoMatchException):
             matcher.match(SimpleClipping("nonexistent phrase that is not in the book"))
 
-    def test_ambiguous_match_raises_exception(self) -> None:
+    def test_ambiguous_match_raises_exception(self, matcher: BookMatcher) -> None:
         """Test that AmbiguousMatchException is raised for multiple matches."""
-        matcher = BookMatcher("Author", "Title", None)
         matcher._text = "The word test appears here. And test appears again here."
 
         with pytest.raises(AmbiguousMatchException) as exc_info:
@@ -110,37 +175,76 @@ class TestBookMatcher:
 
         assert exc_info.value.match_count == 2
 
-    def test_empty_content_raises_value_error(self) -> None:
-        """Test that ValueError is raised for empty content."""
-        matcher = BookMatcher("Author", "Title", None)
-        matcher._text = "Book text."
+    def test_ambiguous_match_reports_exact_count(self, matcher: BookMatcher) -> None:
+        """Test that the match count isn't capped by the early-exit search."""
+        matcher._text = "Echo. Echo. Echo. Echo."
 
-        with pytest.raises(ValueError, match="no content"):
-            matcher.match(SimpleClipping(""))
+        with pytest.raises(AmbiguousMatchException) as exc_info:
+            matcher.match(SimpleClipping("echo"))
 
-    def test_whitespace_only_content_raises_value_error(self) -> None:
-        """Test that ValueError is raised for whitespace-only content."""
-        matcher = BookMatcher("Author", "Title", None)
+        assert exc_info.value.match_count == 4
+
+    @pytest.mark.parametrize("content", ["", "   \n\t  "], ids=["empty", "whitespace"])
+    def test_empty_content_raises_value_error(
+        self, matcher: BookMatcher, content: str
+    ) -> None:
+        """Test that ValueError is raised for empty or whitespace-only content."""
         matcher._text = "Book text."
 
         with pytest.raises(ValueError, match="no content"):
-            matcher.match(SimpleClipping("   \n\t  "))
+            matcher.match(SimpleClipping(content))
 
-    def test_match_with_punctuation_differences(self) -> None:
-        """Test matching when punctuation differs between clipping and book."""
-        matcher = BookMatcher("Author", "Title", None)
-        matcher._text = "The quick, brown fox jumps over the lazy dog."
+    def test_skeleton_is_built_once(self, matcher: BookMatcher) -> None:
+        """Test that repeated matches reuse the book's skeleton."""
+        matcher._text = "One phrase here, another phrase there."
 
-        result = matcher.match(SimpleClipping("quick brown fox"))  # No comma
-        assert isinstance(result, MatchResult)
+        matcher.match(SimpleClipping("one phrase"))
+        skeleton = matcher._skeleton
+        matcher.match(SimpleClipping("another phrase"))
 
-    def test_match_with_case_differences(self) -> None:
-        """Test matching when case differs between clipping and book."""
-        matcher = BookMatcher("Author", "Title", None)
-        matcher._text = "The QUICK Brown Fox Jumps Over The Lazy Dog."
+        assert skeleton is not None
+        assert matcher._skeleton is skeleton
 
-        result = matcher.match(SimpleClipping("quick brown fox"))
-        assert isinstance(result, MatchResult)
+    def test_setting_text_invalidates_skeleton(self, matcher: BookMatcher) -> None:
+        """Test that replacing the text makes matching use the new text."""
+        matcher._text = "The old text."
+        matcher.match(SimpleClipping("old text"))
+
+        matcher._text = "Some new text."
+
+        with pytest.raises(NoMatchException):
+            matcher.match(SimpleClipping("old text"))
+        assert matcher.match(SimpleClipping("new text")).start == 5
+
+    def test_match_many_returns_one_outcome_per_clipping(
+        self, matcher: BookMatcher
+    ) -> None:
+        """Test that match_many reports each clipping's result or exception."""
+        matcher._text = "A unique line. A repeated line. A repeated line."
+
+        results = matcher.match_many(
+            [
+                SimpleClipping("unique line"),
+                SimpleClipping("repeated line"),
+                SimpleClipping("missing line"),
+                SimpleClipping("  "),
+                SimpleClipping("Unique, line!"),
+            ]
+        )
+
+        assert results[0] == MatchResult(start=2, length=11)
+        assert isinstance(results[1], AmbiguousMatchException)
+        assert results[1].match_count == 2
+        assert isinstance(results[2], NoMatchException)
+        assert isinstance(results[3], ValueError)
+        assert results[4] == results[0]
+
+    def test_non_ascii_clipping_in_ascii_text(self, matcher: BookMatcher) -> None:
+        """Test that a non-ASCII clipping never matches an ASCII-only book."""
+        matcher._text = "A plain cafe in an ASCII book."
+
+        with pytest.raises(NoMatchException):
+            matcher.match(SimpleClipping("plain café"))
 
 
 class TestMatchResult: